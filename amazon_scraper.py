@@ -0,0 +1,748 @@
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import functools
+import itertools
+import re
+
+from run_metrics import metric_span
+
+# --- Configuration ---
+DEFAULT_BASE_URL = "https://www.amazon.in"
+
+# Outcome of scraping one model, as recorded by the checkpoint store.
+STATUS_DONE = "done"
+STATUS_NO_MATCH = "no-match"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+# Lowest relevance score for which the best search result is opened.
+MIN_RELEVANCE_SCORE = 8
+# Only the first cards of a search results page are considered.
+MAX_SEARCH_CARDS = 15
+
+column_order = ['Model', 'Brand', 'Price', 'Rating', 'Graphics Card', 'Memory', 'Processor', 'Type: Work or Gaming']
+
+
+def extract_simple_brand(text):
+    text_lower = text.lower()
+    brands = [
+        'hp', 'lenovo', 'dell', 'asus', 'acer', 'msi', 'apple', 'samsung',
+        'microsoft', 'lg', 'gigabyte', 'razer', 'alienware', 'xiaomi', 'tecno',
+        'zebronics', 'microsoft surface', 'huawei', 'vaio', 'toshiba', 'fujitsu'
+    ]
+    for brand in brands:
+        if brand in text_lower:
+            if brand == 'microsoft surface':
+                return 'Microsoft Surface'
+            if re.search(r'\b' + re.escape(brand) + r'\b', text_lower):
+                return brand.capitalize()
+    return None
+
+
+def calculate_relevance_score(search_result_title, original_model_name):
+    original_words = set(re.findall(r'\b\w+\b', original_model_name.lower()))
+    result_words = set(re.findall(r'\b\w+\b', search_result_title.lower()))
+
+    stopwords = {'a', 'an', 'the', 'and', 'or', 'for', 'with', 'from', 'in', 'on', 'of'}
+    original_words = {word for word in original_words if word not in stopwords and len(word) > 1}
+    result_words = {word for word in result_words if word not in stopwords and len(word) > 1}
+
+    common_words = original_words.intersection(result_words)
+    score = len(common_words)
+
+    original_brand = extract_simple_brand(original_model_name)
+    result_brand = extract_simple_brand(search_result_title)
+
+    if original_brand and result_brand:
+        if original_brand == result_brand:
+            score += 15 # Even higher bonus if brands exactly match
+        else:
+            score -= 30 # Even more severe penalty if brands mismatch
+    elif original_brand and not result_brand:
+        score -= 5
+    model_parts_to_match = []
+    # Try to extract actual model number/series
+    model_match = re.search(r'\b(?:victus|ideapad|thinkpad|zenbook|vivobook|legion|omen|spectre|inspiron|pavilion|macbook|galaxy book)\s*([\w\d\-\.]+)', original_model_name.lower())
+    if model_match:
+        model_parts_to_match = model_match.group(0).split() + model_match.group(1).split('-')
+        model_parts_to_match = [p for p in model_parts_to_match if len(p) > 2] # Only meaningful parts
+
+    for part in model_parts_to_match:
+        if part in result_words:
+            score += 3 # Bonus for matching specific model parts
+
+    if original_model_name.lower() in search_result_title.lower(): # Check full phrase match
+        score += 5 # Added bonus for full name match.
+
+    if "refurbished" in search_result_title.lower() or "renewed" in search_result_title.lower():
+        score -= 50 # Extremely severe penalty to filter out refurbished/renewed
+
+    return score
+
+
+# --- Precompiled relevance scorer ---
+# Gives exactly the same scores as calculate_relevance_score, but everything
+# that depends only on the model name (its filtered words, brand and series
+# parts) is computed once per model, and the brand and series regexes are
+# compiled once at import. Use one scorer per model for all of its candidate
+# titles (see rank_candidates). best_possible is the highest score any title
+# can reach for the model: every model word, the brand bonus, every series part
+# that can appear as a word and the full-name bonus.
+BRANDS = [
+    'hp', 'lenovo', 'dell', 'asus', 'acer', 'msi', 'apple', 'samsung',
+    'microsoft', 'lg', 'gigabyte', 'razer', 'alienware', 'xiaomi', 'tecno',
+    'zebronics', 'microsoft surface', 'huawei', 'vaio', 'toshiba', 'fujitsu'
+]
+_BRAND_PRIORITY = {brand: i for i, brand in enumerate(BRANDS)}
+_SURFACE_PRIORITY = _BRAND_PRIORITY['microsoft surface']
+_BRAND_PATTERN = re.compile(
+    r'\b(' + '|'.join(re.escape(brand) for brand in sorted(BRANDS, key=len, reverse=True) if ' ' not in brand) + r')\b'
+)
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+_SERIES_PATTERN = re.compile(r'\b(?:victus|ideapad|thinkpad|zenbook|vivobook|legion|omen|spectre|inspiron|pavilion|macbook|galaxy book)\s*([\w\d\-\.]+)')
+_STOPWORDS = frozenset({'a', 'an', 'the', 'and', 'or', 'for', 'with', 'from', 'in', 'on', 'of'})
+
+
+# Same result as extract_simple_brand(text) for already lower-cased text: the
+# first brand in BRANDS order that appears as a whole word, where 'microsoft
+# surface' only needs to appear as a substring.
+def _brand_of_lower(text_lower):
+    found = _BRAND_PATTERN.findall(text_lower)
+    best = min((_BRAND_PRIORITY[brand] for brand in found), default=None)
+    if (best is None or best > _SURFACE_PRIORITY) and 'microsoft surface' in text_lower:
+        return 'Microsoft Surface'
+    if best is None:
+        return None
+    return BRANDS[best].capitalize()
+
+
+def _filtered_words(text_lower):
+    return {word for word in _WORD_PATTERN.findall(text_lower) if word not in _STOPWORDS and len(word) > 1}
+
+
+# The series part of a model name (e.g. "victus 15-fb0157ax"), or None.
+def model_series(model_name):
+    model_match = _SERIES_PATTERN.search(model_name.lower())
+    return model_match.group(0) if model_match else None
+
+
+class RelevanceScorer:
+    def __init__(self, original_model_name):
+        self.model_name = original_model_name
+        self.model_lower = original_model_name.lower()
+        self.original_words = _filtered_words(self.model_lower)
+        self.original_brand = _brand_of_lower(self.model_lower)
+
+        model_parts_to_match = []
+        model_match = _SERIES_PATTERN.search(self.model_lower)
+        if model_match:
+            model_parts_to_match = model_match.group(0).split() + model_match.group(1).split('-')
+            model_parts_to_match = [p for p in model_parts_to_match if len(p) > 2]
+        self.model_parts_to_match = model_parts_to_match
+        self.best_possible = (
+            len(self.original_words) + (15 if self.original_brand else 0) + 5
+            + 3 * sum(1 for part in model_parts_to_match if _WORD_PATTERN.fullmatch(part) and part not in _STOPWORDS)
+        )
+
+    def score(self, search_result_title):
+        title_lower = search_result_title.lower()
+        result_words = _filtered_words(title_lower)
+        score = len(self.original_words & result_words)
+
+        if self.original_brand:
+            result_brand = _brand_of_lower(title_lower)
+            if result_brand:
+                score += 15 if result_brand == self.original_brand else -30
+            else:
+                score -= 5
+
+        for part in self.model_parts_to_match:
+            if part in result_words:
+                score += 3
+
+        if self.model_lower in title_lower:
+            score += 5
+
+        if "refurbished" in title_lower or "renewed" in title_lower:
+            score -= 50
+
+        return score
+
+
+def empty_laptop_record(model_name):
+    if "gaming" in model_name.lower():
+        type_work_gaming = "Gaming"
+    else:
+        type_work_gaming = "Work"
+    return {
+        'Model': model_name, 'Brand': 'N/A', 'Price': 'N/A', 'Rating': 'N/A', 'Graphics Card': 'N/A',
+        'Memory': 'N/A', 'Processor': 'N/A', 'Type: Work or Gaming': type_work_gaming
+    }
+
+
+def build_search_url(model_name, base_url=DEFAULT_BASE_URL):
+    search_query = model_name.replace(' ', '+')
+    return f"{base_url}/s?k={search_query}"
+
+
+# --- Search result card extraction ---
+# Yields one dict per card (title, sponsored, link) for the first
+# MAX_SEARCH_CARDS cards of a fetched page (see html_page.HtmlPage). title is
+# None when the card has no title heading and link is None when it has no
+# product (/dp/) link. Cards are read one at a time, so a caller that stops
+# early never reads the remaining cards.
+SEARCH_CARD_SELECTOR = 'div[data-component-type="s-search-result"]'
+
+
+ASIN_PATTERN = re.compile(r'/dp/([A-Z0-9]{10})')
+
+
+def asin_from_link(product_link):
+    match = ASIN_PATTERN.search(product_link or "")
+    return match.group(1) if match else None
+
+
+def is_product_link(href):
+    return bool(href) and '/dp/' in href and not ('/s?' in href or 'node=' in href or '/gp/' in href)
+
+
+def extract_search_cards(page):
+    for card in page.find_elements(By.CSS_SELECTOR, SEARCH_CARD_SELECTOR)[:MAX_SEARCH_CARDS]:
+        title = None
+        is_sponsored = False
+        result_link = None
+
+        headings = card.find_elements(By.CSS_SELECTOR, 'h2.a-text-normal')
+        if headings:
+            title = headings[0].text.strip()
+            aria_label = headings[0].get_attribute('aria-label')
+            is_sponsored = bool(aria_label) and "sponsored ad" in aria_label.lower()
+
+        for link_el in card.find_elements(By.TAG_NAME, 'a'):
+            href = link_el.get_attribute('href')
+            if is_product_link(href):
+                result_link = href
+                break
+
+        yield {'title': title, 'sponsored': is_sponsored, 'link': result_link}
+
+
+# --- Relevance check on the extracted cards ---
+# Scores plain card dicts against the model name and returns
+# (best_match_link, best_match_title, max_score, cards_scored). Cards are
+# scored in page order. Only a strictly higher score replaces the best match, so
+# once it reaches the scorer's best_possible no later card can win and the rest
+# are skipped (early_exit); the result is the same as scoring every card.
+def rank_candidates(cards, model_name, early_exit=True):
+    best_match_link = None
+    best_match_title = ""
+    max_score = -100 # Very low initial score to handle severe penalties
+    cards_scored = 0
+
+    scorer = RelevanceScorer(model_name)
+    for card in cards:
+        result_title = card['title']
+        result_link = card['link']
+        if result_title is None or not result_link:
+            continue
+
+        current_score = scorer.score(result_title)
+        cards_scored += 1
+        if card['sponsored']:
+            current_score -= 10 # Penalize sponsored ads
+
+        if current_score > max_score:
+            max_score = current_score
+            best_match_link = result_link
+            best_match_title = result_title
+            if early_exit and max_score >= scorer.best_possible:
+                break
+
+    return best_match_link, best_match_title, max_score, cards_scored
+
+
+def rank_search_results(page, model_name):
+    cards = extract_search_cards(page)
+    first_card = next(cards, None)
+    if first_card is None:
+        print(f"  No product cards found on search results page for '{model_name}'.")
+        return None, "", -100
+    best_match_link, best_match_title, max_score, _ = rank_candidates(itertools.chain([first_card], cards), model_name)
+    return best_match_link, best_match_title, max_score
+
+
+# --- Product detail page extraction ---
+# Split in two steps. read_product_page pulls everything needed off the page
+# (price, rating, the spec label -> value dict and the byline/title text used as
+# a brand fallback) into a small dict. extract_specs (or the original
+# build_product_details it is checked against) turns that dict plus the search
+# result title into the output fields. read_price and read_rating are also
+# used on their own by the price refresh. Reading works on anything with the
+# WebDriver lookup API: a live driver or an HtmlPage.
+def read_price(page):
+    # --- Extract Price ---
+    price = 'N/A'
+    try:
+        price_element_offscreen = page.find_element(By.CSS_SELECTOR, 'span.a-offscreen')
+        price = price_element_offscreen.get_attribute('textContent').strip()
+        print(f"    Price (offscreen): {price}")
+    except NoSuchElementException:
+        try:
+            price_container_selector = '#corePrice_feature_div, #priceblock_ourprice, .reinventPricePriceToPayMargin'
+            price_container = page.find_element(By.CSS_SELECTOR, price_container_selector)
+
+            price_whole = price_container.find_element(By.CSS_SELECTOR, 'span.a-price-whole').text.strip()
+
+            try:
+                price_fraction = price_container.find_element(By.CSS_SELECTOR, 'span.a-price-fraction').text.strip()
+                price = f"₹{price_whole}.{price_fraction}"
+            except NoSuchElementException:
+                pass
+            print(f"    Price (visible): {price}")
+        except NoSuchElementException:
+            print("    Price not found on product page via common visible selectors.")
+    except Exception as e:
+        print(f"    Error extracting price: {e}")
+    return price
+
+
+def read_rating(page):
+    rating = 'N/A'
+    try:
+        rating_text = ""
+        try:
+            rating_summary_element = page.find_element(By.CSS_SELECTOR, '#averageCustomerReviews span.a-icon-alt')
+            rating_text = rating_summary_element.get_attribute('innerHTML').strip()
+        except NoSuchElementException:
+            try:
+                review_link_element = page.find_element(By.CSS_SELECTOR, '#acrCustomerReviewLink')
+                aria_label_rating = review_link_element.get_attribute('aria-label')
+                if aria_label_rating and "out of" in aria_label_rating.lower():
+                    rating_text = aria_label_rating
+            except NoSuchElementException:
+                try:
+                    general_rating_element = page.find_element(By.CSS_SELECTOR, 'span.a-icon-alt')
+
+                    if "previous" not in general_rating_element.get_attribute('innerHTML').lower():
+                        rating_text = general_rating_element.get_attribute('innerHTML').strip()
+                except NoSuchElementException:
+                    pass
+
+        if rating_text:
+            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+            if rating_match:
+                rating = rating_match.group(1)
+            else:
+                rating = 'N/A'
+        else:
+            rating = 'N/A'
+
+        print(f"    Rating: {rating}")
+    except Exception as e:
+        print(f"    Error extracting rating: {e}")
+    return rating
+
+
+# Spec label -> value dict, plus the byline (or title) text used for the brand.
+def read_specs(page):
+    # --- Extracting detailed specs (Graphics Card, Memory, Processor, Brand) ---
+    specs_dict = {}
+
+    try:
+        specs_table = None
+        try:
+            specs_table = page.find_element(By.CSS_SELECTOR, '#productDetails_techSpec_section_1 table.a-normal.a-spacing-micro')
+        except NoSuchElementException:
+            try:
+                specs_table = page.find_element(By.CSS_SELECTOR, 'table.a-normal.a-spacing-micro')
+            except NoSuchElementException:
+                pass
+
+        if specs_table:
+            table_rows = specs_table.find_elements(By.TAG_NAME, 'tr')
+            for row in table_rows:
+                try:
+                    label_element = row.find_element(By.CSS_SELECTOR, 'td:nth-child(1) span.a-text-bold')
+                    value_element = row.find_element(By.CSS_SELECTOR, 'td:nth-child(2) span.a-size-base.po-break-word')
+                    label = label_element.text.strip().replace(':', '').strip()
+                    value = value_element.text.strip()
+                    specs_dict[label] = value
+                except NoSuchElementException:
+                    pass
+                except Exception as e:
+                    print(f"      Error parsing table row: {e}")
+
+        if not specs_dict:
+            try:
+                detail_bullets_ul = page.find_element(By.CSS_SELECTOR, '#detailBullets_feature_div ul.a-unordered-list')
+                list_items = detail_bullets_ul.find_elements(By.TAG_NAME, 'li')
+
+                for item in list_items:
+                    try:
+                        label_element = item.find_element(By.CSS_SELECTOR, 'span.a-text-bold')
+                        label = label_element.text.strip().replace(':', '').strip()
+
+                        item_text_full = item.text.strip()
+                        value = item_text_full.replace(label_element.text.strip(), '', 1).strip()
+
+                        specs_dict[label] = value
+                    except NoSuchElementException:
+                        pass
+                    except Exception as e:
+                        print(f"      Error parsing specific list item: {e}")
+            except NoSuchElementException:
+                print("    Neither table nor UL specs container found. Specs will be N/A.")
+            except Exception as e:
+                print(f"    Error processing structured UL specs: {e}.")
+
+    except Exception as e:
+        print(f"    Error processing structured specs: {e}. Specs will be N/A.")
+
+    # Byline (or title) text, used for the brand when the specs have none.
+    brand_text = None
+    try:
+        try:
+            brand_text = page.find_element(By.ID, 'bylineInfo').text.strip()
+        except NoSuchElementException:
+            brand_text = page.find_element(By.ID, 'productTitle').text.strip()
+    except NoSuchElementException:
+        pass
+    except Exception as e:
+        print(f"    Error extracting brand (fallback): {e}")
+
+    return specs_dict, brand_text
+
+
+def read_product_page(page, metrics=None, model_name=None):
+    with metric_span(metrics, "price", model_name):
+        price = read_price(page)
+    with metric_span(metrics, "rating", model_name):
+        rating = read_rating(page)
+    with metric_span(metrics, "specs", model_name):
+        specs_dict, brand_text = read_specs(page)
+    return {'price': price, 'rating': rating, 'specs': specs_dict, 'brand_text': brand_text}
+
+
+def build_product_details(product_info, best_match_title):
+    specs_dict = product_info['specs']
+    brand = 'N/A'
+    graphics_card = 'N/A'
+    memory = 'N/A'
+    processor = 'N/A'
+
+    try:
+        # Extract Brand
+        brand_from_specs = specs_dict.get("Brand", None)
+        if brand_from_specs:
+            extracted_brand = extract_simple_brand(brand_from_specs)
+            if extracted_brand:
+                brand = extracted_brand
+            else:
+                brand = brand_from_specs # Use raw if simple_brand couldn't extract
+
+        if (brand == 'N/A' or brand is None) and product_info['brand_text'] is not None:
+            brand_element_text = product_info['brand_text']
+            extracted_brand_fallback = extract_simple_brand(brand_element_text)
+            if extracted_brand_fallback:
+                brand = extracted_brand_fallback
+            else:
+                first_word_match = re.match(r'^[A-Za-z]+', brand_element_text)
+                if first_word_match:
+                    brand = first_word_match.group(0)
+
+        # Processor (for better specificity)
+        processor_text = specs_dict.get("Processor", "").lower()
+        if not processor_text:
+            processor_text = specs_dict.get("CPU Model", "").lower()
+        if not processor_text and best_match_title: # Try best_match_title as source if specs_dict fails
+            processor_text = best_match_title.lower()
+
+        # Regex for more specific processor models
+        ryzen_match = re.search(r'(amd ryzen\s*[\d.x]+[hshx]?(?: \w+)?|amd ryzen\s*[3579]\s*\d*[hshx]?)', processor_text)
+        intel_match = re.search(r'(intel core\s*i[3579]\s*\d*[ghx]?)', processor_text)
+        apple_m_match = re.search(r'(apple m[1-3](?: pro| max| ultra)?)', processor_text)
+
+        if ryzen_match: processor = ryzen_match.group(1).upper()
+        elif intel_match: processor = intel_match.group(1).upper()
+        elif apple_m_match: processor = apple_m_match.group(1).upper()
+        elif processor_text: # Fallback to original text if no specific regex match but text exists
+            processor = specs_dict.get("Processor", specs_dict.get("CPU Model", 'N/A'))
+            if processor == 'N/A' and best_match_title: # If still N/A, try rough from title
+                 processor = "INTEL CORE" if "intel core" in best_match_title.lower() else ("AMD RYZEN" if "amd ryzen" in best_match_title.lower() else "N/A")
+
+
+        # Memory (RAM)
+        memory_text = specs_dict.get("RAM", "").lower()
+        if not memory_text:
+            memory_text = specs_dict.get("Memory", "").lower()
+        if not memory_text:
+            memory_text = specs_dict.get("RAM Memory Installed Size", "").lower()
+        ram_match = re.search(r'(\d+)\s*gb\s*ram', memory_text)
+        if ram_match: memory = ram_match.group(1) + "GB"
+        elif memory_text:
+            memory = specs_dict.get("RAM", specs_dict.get("Memory", specs_dict.get("RAM Memory Installed Size", 'N/A')))
+
+
+        # Graphics Card (for better specificity from title)
+        graphics_text = specs_dict.get("Graphics Coprocessor", "").lower()
+        if not graphics_text:
+            graphics_text = specs_dict.get("Graphics Card Description", "").lower()
+        if not graphics_text:
+            graphics_text = specs_dict.get("GPU", "").lower()
+
+        if not graphics_text and best_match_title: # Use best_match_title for graphics if specs_dict didn't yield
+            graphics_text = best_match_title.lower()
+
+        # Regex for specific GPU models
+        rtx_match = re.search(r'(nvidia rtx\s*\d{3,4}0)', graphics_text)
+        gtx_match = re.search(r'(nvidia gtx\s*\d{3,4}0)', graphics_text)
+        radeon_match = re.search(r'(amd radeon\s*(?:rx\s*\d{3,4}|vega|graphics)?)', graphics_text)
+
+        if rtx_match: graphics_card = rtx_match.group(1).upper()
+        elif gtx_match: graphics_card = gtx_match.group(1).upper()
+        elif radeon_match: graphics_card = radeon_match.group(1).upper()
+        elif "intel iris xe" in graphics_text: graphics_card = "Intel Iris Xe"
+        elif "integrated graphics" in graphics_text or "intel uhd" in graphics_text or "intel hd" in graphics_text:
+            graphics_card = "Integrated"
+        elif graphics_text: # Fallback to original value if no specific match
+            graphics_card = specs_dict.get("Graphics Coprocessor", specs_dict.get("Graphics Card Description", specs_dict.get("GPU", 'N/A')))
+            if graphics_card == 'N/A' and best_match_title: # If still N/A, use very rough from title
+                graphics_card = "Dedicated" if "rtx" in best_match_title.lower() or "gtx" in best_match_title.lower() or "radeon" in best_match_title.lower() else "Integrated"
+
+    except Exception as e:
+        print(f"    Error processing structured specs: {e}. Specs will be N/A.")
+
+    return {
+        'Brand': brand,
+        'Price': product_info['price'],
+        'Rating': product_info['rating'],
+        'Graphics Card': graphics_card,
+        'Memory': memory,
+        'Processor': processor,
+    }
+
+
+# --- Table-driven spec extraction ---
+# Gives exactly the same fields as build_product_details, but the rules are
+# data: for every output field, the spec keys to read in priority order, whether
+# the search result title is the last text source, and an ordered list of
+# matchers. A matcher is a literal needle the text must contain plus either a
+# regex whose first group is normalised by a function, or (with no regex) a
+# fixed value; the needle is checked first, as it is much cheaper than a regex
+# search. If no matcher fires, the raw value of the first spec key present is
+# kept, and if there is none, title_guess makes a rough call from the title. The
+# regexes are compiled once at import and the title is lower-cased once per row.
+def _guess_processor_from_title(title_lower):
+    if "intel core" in title_lower:
+        return "INTEL CORE"
+    return "AMD RYZEN" if "amd ryzen" in title_lower else "N/A"
+
+
+def _guess_graphics_from_title(title_lower):
+    if "rtx" in title_lower or "gtx" in title_lower or "radeon" in title_lower:
+        return "Dedicated"
+    return "Integrated"
+
+
+SPEC_FIELD_RULES = [
+    {
+        'field': 'Processor',
+        'sources': ('Processor', 'CPU Model'),
+        'title_source': True,
+        'matchers': (
+            ('amd ryzen', r'(amd ryzen\s*[\d.x]+[hshx]?(?: \w+)?|amd ryzen\s*[3579]\s*\d*[hshx]?)', str.upper),
+            ('intel core', r'(intel core\s*i[3579]\s*\d*[ghx]?)', str.upper),
+            ('apple m', r'(apple m[1-3](?: pro| max| ultra)?)', str.upper),
+        ),
+        'title_guess': _guess_processor_from_title,
+    },
+    {
+        'field': 'Memory',
+        'sources': ('RAM', 'Memory', 'RAM Memory Installed Size'),
+        'title_source': False,
+        'matchers': (
+            ('gb', r'(\d+)\s*gb\s*ram', lambda size: size + "GB"),
+        ),
+        'title_guess': None,
+    },
+    {
+        'field': 'Graphics Card',
+        'sources': ('Graphics Coprocessor', 'Graphics Card Description', 'GPU'),
+        'title_source': True,
+        'matchers': (
+            ('nvidia rtx', r'(nvidia rtx\s*\d{3,4}0)', str.upper),
+            ('nvidia gtx', r'(nvidia gtx\s*\d{3,4}0)', str.upper),
+            ('amd radeon', r'(amd radeon\s*(?:rx\s*\d{3,4}|vega|graphics)?)', str.upper),
+            ('intel iris xe', None, 'Intel Iris Xe'),
+            ('integrated graphics', None, 'Integrated'),
+            ('intel uhd', None, 'Integrated'),
+            ('intel hd', None, 'Integrated'),
+        ),
+        'title_guess': _guess_graphics_from_title,
+    },
+]
+
+_FIRST_WORD_PATTERN = re.compile(r'^[A-Za-z]+')
+_COMPILED_FIELD_RULES = [
+    (rule['field'], rule['sources'], rule['title_source'],
+     tuple((needle, re.compile(pattern).search if pattern else None, output)
+           for needle, pattern, output in rule['matchers']),
+     rule['title_guess'])
+    for rule in SPEC_FIELD_RULES
+]
+
+
+# Spec values and titles repeat a lot across pages, so the matcher result for a
+# (rule, text) pair is cached.
+@functools.lru_cache(maxsize=65536)
+def _match_field_text(rule_index, text):
+    for needle, search, output in _COMPILED_FIELD_RULES[rule_index][3]:
+        if needle in text:
+            if search is None:
+                return output
+            match = search(text)
+            if match:
+                return output(match.group(1))
+    return None
+
+
+def _apply_field_rule(rule_index, specs_dict, title_lower):
+    _, sources, title_source, _, title_guess = _COMPILED_FIELD_RULES[rule_index]
+    text = ""
+    for key in sources:
+        text = specs_dict.get(key, "").lower()
+        if text:
+            break
+    if not text:
+        if not (title_source and title_lower):
+            return 'N/A'
+        text = title_lower
+    value = _match_field_text(rule_index, text)
+    if value is not None:
+        return value
+    value = 'N/A'
+    for key in sources:
+        if key in specs_dict:
+            value = specs_dict[key]
+            break
+    if value == 'N/A' and title_lower and title_guess:
+        value = title_guess(title_lower)
+    return value
+
+
+@functools.lru_cache(maxsize=16384)
+def _brand_of(text):
+    return _brand_of_lower(text.lower())
+
+
+# Brand: the spec table's "Brand" entry, else the byline (or product title)
+# text; each goes through the brand list, then falls back to the raw entry or
+# to the first word of the byline.
+def _brand_from(specs_dict, brand_text):
+    brand_from_specs = specs_dict.get("Brand", None)
+    if brand_from_specs:
+        brand = _brand_of(brand_from_specs) or brand_from_specs
+        if brand != 'N/A':
+            return brand
+    if brand_text is not None:
+        brand = _brand_of(brand_text)
+        if brand:
+            return brand
+        first_word_match = _FIRST_WORD_PATTERN.match(brand_text)
+        if first_word_match:
+            return first_word_match.group(0)
+    return 'N/A'
+
+
+def extract_specs(product_info, best_match_title):
+    specs_dict = product_info['specs']
+    details = {
+        'Brand': 'N/A',
+        'Price': product_info['price'],
+        'Rating': product_info['rating'],
+        'Graphics Card': 'N/A',
+        'Memory': 'N/A',
+        'Processor': 'N/A',
+    }
+    try:
+        details['Brand'] = _brand_from(specs_dict, product_info['brand_text'])
+        title_lower = best_match_title.lower() if best_match_title else ""
+        for rule_index, compiled_rule in enumerate(_COMPILED_FIELD_RULES):
+            details[compiled_rule[0]] = _apply_field_rule(rule_index, specs_dict, title_lower)
+    except Exception as e:
+        print(f"    Error processing structured specs: {e}. Specs will be N/A.")
+    return details
+
+
+# --- Scrape a single laptop model ---
+# Runs the search -> relevance check -> product page flow through the given
+# fetcher and returns (row to save, status). The caller owns the fetcher and the output.
+def scrape_model(fetcher, model_name, base_url=DEFAULT_BASE_URL, asin_index=None, product_memo=None, metrics=None):
+    laptop_data = empty_laptop_record(model_name)
+    status = STATUS_DONE
+
+    try:
+        # --- Skip the search when the ASIN index already knows this model ---
+        resolved = asin_index.lookup(model_name) if asin_index else None
+        if resolved:
+            product_link = resolved['product_link']
+            best_match_title = resolved['title']
+            print(f"  Resolved from ASIN index ({resolved['asin']}, {resolved['match']} match). Navigating to: {product_link}")
+        else:
+            amazon_search_url = build_search_url(model_name, base_url)
+
+            # --- Wait for search results and implement relevance check ---
+            try:
+                with metric_span(metrics, "search_load", model_name):
+                    search_page = fetcher.get_search_page(amazon_search_url)
+            except TimeoutException:
+                print(f"  Timed out waiting for Amazon search results for '{model_name}'. No results or slow load. Moving to next.")
+                fetcher.pacer.pause(10, 15)
+                return laptop_data, STATUS_TIMEOUT
+
+            print("  Amazon search results page loaded. Checking relevance...")
+            with metric_span(metrics, "ranking", model_name):
+                best_match_link, best_match_title, max_score = rank_search_results(search_page, model_name)
+
+            # Decide if a good enough match was found (Stricter threshold)
+            if best_match_link and max_score >= MIN_RELEVANCE_SCORE: # Higher score threshold for navigating to product page
+                product_link = best_match_link
+                print(f"  Best relevant product found (Score: {max_score}). Navigating to: {product_link}")
+                if asin_index:
+                    asin_index.record(model_name, product_link, best_match_title, max_score)
+            else:
+                print(f"  No sufficiently relevant product found for '{model_name}' (Best Score: {max_score}). Moving to next.")
+                fetcher.pacer.pause(10, 15)
+                return laptop_data, STATUS_NO_MATCH
+
+        # --- Navigate to the product detail page ---
+        def load_product_info():
+            with metric_span(metrics, "product_load", model_name):
+                product_page = fetcher.get_product_page(product_link)
+            print("  Product detail page loaded.")
+            return read_product_page(product_page, metrics, model_name)
+
+        try:
+            asin = asin_from_link(product_link)
+            if product_memo and asin:
+                product_info = product_memo.get(asin, load_product_info)
+            else:
+                product_info = load_product_info()
+            with metric_span(metrics, "spec_rules", model_name):
+                laptop_data.update(extract_specs(product_info, best_match_title))
+        except TimeoutException:
+            print(f"  Timed out loading product detail page for '{model_name}'. Moving to next.")
+            status = STATUS_TIMEOUT
+            if resolved:
+                # The listing may be gone; search again on the retry.
+                asin_index.forget(model_name)
+        except Exception as e:
+            print(f"  An error occurred during product page navigation or extraction for '{model_name}': {e}")
+            status = STATUS_ERROR
+
+    except Exception as e:
+        print(f"An unexpected error occurred while processing '{model_name}': {e}")
+        status = STATUS_ERROR
+
+    fetcher.pacer.pause(7, 15)
+    return laptop_data, status
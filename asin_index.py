@@ -0,0 +1,126 @@
+import re
+import sqlite3
+import threading
+import time
+
+from amazon_scraper import asin_from_link, extract_simple_brand, model_series
+
+# How much a lookup key is trusted to identify the same Amazon listing.
+CONFIDENCE_EXACT = 1.0   # same model string, ignoring case and punctuation
+CONFIDENCE_NAME = 0.8    # same name once the "(CPU/ RAM/ SSD/ OS)" config part is dropped
+CONFIDENCE_SERIES = 0.6  # same brand and series token, e.g. "hp victus 15-fb0157ax"
+
+
+def _normalize(text):
+    return " ".join(re.findall(r'\w+', text.lower()))
+
+
+# Lookup keys for a model, most specific first: (key, match kind, confidence).
+def index_keys(model_name):
+    keys = [("exact:" + _normalize(model_name), "exact", CONFIDENCE_EXACT)]
+    base_name = _normalize(re.sub(r'\([^)]*\)', ' ', model_name))
+    if base_name:
+        keys.append(("name:" + base_name, "name", CONFIDENCE_NAME))
+    series = model_series(model_name)
+    if series:
+        brand = extract_simple_brand(model_name) or ""
+        keys.append(("series:" + _normalize(f"{brand} {series}"), "series", CONFIDENCE_SERIES))
+    return keys
+
+
+# Config tokens of a model, e.g. {"m3", "max", "48gb", "1tb"} for
+# "MacBook Pro 16 (M3 Max/ 48GB/ 1TB SSD/ macOS)": the words of its "(...)" part.
+def config_tokens(model_name):
+    tokens = set()
+    for part in re.findall(r'\(([^)]*)\)', model_name):
+        tokens.update(_normalize(part).split())
+    return tokens
+
+
+# True when a listing title names every config token of the model. Spaced
+# spellings count too ("48 GB" matches "48gb").
+def title_has_config(title, tokens):
+    words = _normalize(title).split()
+    present = set(words) | {a + b for a, b in zip(words, words[1:])}
+    return tokens <= present
+
+
+# --- Persistent model -> ASIN index ---
+# Every model that a search resolves to a product page is stored under its
+# exact, name and series keys. Later rows (in this run or the next) whose key
+# is trusted at least min_confidence skip the search and open the product page
+# directly. Only the exact key is trusted by default: a name or series key is
+# shared by every configuration of a laptop, so a hit on one is used only when
+# the stored listing title still names the row's config (CPU, RAM, storage).
+# Shared by all workers, hence the lock.
+class AsinIndex:
+    def __init__(self, path, min_confidence=CONFIDENCE_EXACT):
+        self.min_confidence = min_confidence
+        self.lookups = 0
+        self.hits = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS asin_index ("
+            " key TEXT PRIMARY KEY,"
+            " asin TEXT NOT NULL,"
+            " product_link TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " score INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, model_name):
+        with self.lock:
+            self.lookups += 1
+            tokens = config_tokens(model_name)
+            for key, kind, confidence in index_keys(model_name):
+                if confidence < self.min_confidence:
+                    break
+                row = self.conn.execute(
+                    "SELECT asin, product_link, title FROM asin_index WHERE key = ?", (key,)
+                ).fetchone()
+                if row and (kind == "exact" or title_has_config(row[2], tokens)):
+                    self.hits += 1
+                    return {'asin': row[0], 'product_link': row[1], 'title': row[2], 'match': kind}
+        return None
+
+    # Product link stored under the exact key of model_name, or None. Unlike
+    # lookup, it never falls back to broader keys and is not counted in the hit
+    # rate.
+    def exact_link(self, model_name):
+        key = index_keys(model_name)[0][0]
+        with self.lock:
+            row = self.conn.execute("SELECT product_link FROM asin_index WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, model_name, product_link, title, score):
+        asin = asin_from_link(product_link)
+        if not asin:
+            return
+        now = time.time()
+        with self.lock, self.conn:
+            for key, _, _ in index_keys(model_name):
+                # An exact key always follows the latest search; broader keys
+                # keep the best-scoring listing seen for them.
+                self.conn.execute(
+                    "INSERT INTO asin_index (key, asin, product_link, title, score, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET asin = excluded.asin, product_link = excluded.product_link, "
+                    "title = excluded.title, score = excluded.score, updated_at = excluded.updated_at "
+                    "WHERE key LIKE 'exact:%' OR excluded.score >= asin_index.score",
+                    (key, asin, product_link, title, score, now),
+                )
+
+    def forget(self, model_name):
+        with self.lock, self.conn:
+            for key, _, _ in index_keys(model_name):
+                self.conn.execute("DELETE FROM asin_index WHERE key = ?", (key,))
+
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,94 @@
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import RelevanceScorer, calculate_relevance_score, rank_candidates  # noqa: E402
+
+# --- Relevance scoring micro-benchmark ---
+# Scores every model in laptop_models.csv against a batch of candidate titles
+# (the "Name" column of nearby rows plus refurbished/sponsored-style variants)
+# with both calculate_relevance_score and RelevanceScorer. It checks that every
+# score is identical, then prints the timings of both. It then ranks the same
+# titles as search cards (in rotated order, every fifth one sponsored) with and
+# without the early exit, checks that both pick the same card, and reports how
+# many cards the early exit left unscored.
+#
+#   python benchmarks/bench_relevance.py [laptop_models.csv] [titles per model]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_rows(csv_path):
+    with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+        return [(row['Model'], row.get('Name') or row['Model']) for row in csv.DictReader(f) if row.get('Model')]
+
+
+def candidate_titles(rows, i, count):
+    titles = []
+    for offset in range(count):
+        model, name = rows[(i + offset) % len(rows)]
+        variant = offset % 4
+        if variant == 0:
+            titles.append(model)
+        elif variant == 1:
+            titles.append(name)
+        elif variant == 2:
+            titles.append(f"(Renewed) {name}")
+        else:
+            titles.append(f"{name} with Microsoft Surface Pen, Backlit Keyboard")
+    return titles
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(REPO_DIR, "laptop_models.csv")
+    titles_per_model = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    rows = load_rows(csv_path)
+    batches = [(model, candidate_titles(rows, i, titles_per_model)) for i, (model, _) in enumerate(rows)]
+    pairs = sum(len(titles) for _, titles in batches)
+
+    started = time.perf_counter()
+    expected = [[calculate_relevance_score(title, model) for title in titles] for model, titles in batches]
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = []
+    for model, titles in batches:
+        scorer = RelevanceScorer(model)
+        actual.append([scorer.score(title) for title in titles])
+    scorer_seconds = time.perf_counter() - started
+
+    mismatches = sum(a != e for got, want in zip(actual, expected) for a, e in zip(got, want))
+    print(f"{len(batches)} models x {titles_per_model} titles = {pairs} scores")
+    print(f"calculate_relevance_score: {reference_seconds * 1000:8.1f} ms ({pairs / reference_seconds:10.0f} scores/s)")
+    print(f"RelevanceScorer:           {scorer_seconds * 1000:8.1f} ms ({pairs / scorer_seconds:10.0f} scores/s)")
+    print(f"Speed-up: {reference_seconds / scorer_seconds:.1f}x")
+    print(f"Parity: {pairs - mismatches}/{pairs} scores identical")
+
+    card_batches = []
+    for i, (model, titles) in enumerate(batches):
+        shift = i % len(titles)
+        titles = titles[shift:] + titles[:shift]
+        card_batches.append((model, [{'title': title, 'sponsored': j % 5 == 4, 'link': f"/dp/B{i:04d}{j:05d}"}
+                                     for j, title in enumerate(titles)]))
+    started = time.perf_counter()
+    full = [rank_candidates(cards, model, early_exit=False) for model, cards in card_batches]
+    full_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    early = [rank_candidates(cards, model) for model, cards in card_batches]
+    early_seconds = time.perf_counter() - started
+
+    rank_mismatches = sum(a[:3] != b[:3] for a, b in zip(full, early))
+    scored = sum(result[3] for result in early)
+    exits = sum(result[3] < len(cards) for result, (_, cards) in zip(early, card_batches))
+    print(f"Ranking: {full_seconds * 1000:.1f} ms scoring every card, {early_seconds * 1000:.1f} ms with early exit; "
+          f"{exits}/{len(batches)} searches stopped early, {pairs - scored} of {pairs} cards skipped")
+    print(f"Ranking parity: {len(batches) - rank_mismatches}/{len(batches)} searches picked the same card")
+    if mismatches or rank_mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
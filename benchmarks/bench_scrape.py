@@ -0,0 +1,299 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import functools
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_server import FIXTURES_DIR, FixtureSite  # noqa: E402
+
+# --- End-to-end scraping benchmark ---
+# Runs the real scraping flow (fetchers, ranking, product page reading, spec
+# rules) against the recorded pages in fixtures/, served by a local
+# FixtureSite, so no request leaves the machine. Pauses are switched off and
+# the ASIN index and product page memo are not used, so every model costs one
+# search page and (when it matches) one product page.
+#
+# Every backend x concurrency x mode combination runs in a fresh Python
+# process. Concurrency 1 runs the plain sequential loop; higher levels run the
+# worker pool and the pipeline with that many fetch sessions. For each run the
+# report shows models per minute, CPU seconds and peak RSS. CPU and peak RSS
+# come from the rusage of the benchmark process, which includes chromedriver
+# and Chrome once they have exited; the CPU the process spent on imports is
+# left out, and peak RSS is that of the largest single process. Neither is
+# available on Windows.
+#
+# Results are appended to --results together with the current commit. Each
+# run is compared with the last recorded run of the same combination on a
+# different commit (or on --baseline), and the script exits with status 1 when
+# throughput dropped, or CPU per model or peak RSS grew, by more than
+# --threshold.
+#
+#   python benchmarks/bench_scrape.py [--backends http,selenium] [--concurrency 1,2,4]
+#                                     [--models 60] [--latency-ms 80] [--chromedriver PATH]
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.jsonl")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping flow against recorded Amazon pages.")
+    parser.add_argument("--backends", default="http",
+                        help="Comma-separated fetch backends to run: http, selenium (default: http).")
+    parser.add_argument("--concurrency", default="1,2,4",
+                        help="Comma-separated numbers of fetch sessions (default: 1,2,4).")
+    parser.add_argument("--modes", default="sequential,pool,pipeline",
+                        help="Comma-separated run modes: sequential (concurrency 1 only), pool, pipeline.")
+    parser.add_argument("--models", type=int, default=60,
+                        help="Models per run; the fixture model list is repeated to this length (default: 60).")
+    parser.add_argument("--latency-ms", type=float, default=80,
+                        help="Delay the fixture server adds to every page, standing in for the network (default: 80).")
+    parser.add_argument("--chromedriver", default="chromedriver",
+                        help="Path to ChromeDriver for the selenium backend.")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Run Chrome without the lean profile (images, media and trackers load).")
+    parser.add_argument("--recycle-pages", type=int, default=0,
+                        help="Restart Chrome sessions after this many page loads (default: never).")
+    parser.add_argument("--results", default=RESULTS_PATH,
+                        help="JSONL file the results are appended to and compared against.")
+    parser.add_argument("--baseline", default="",
+                        help="Compare against the runs recorded for this commit instead of the latest other one.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (default: 0.10).")
+    parser.add_argument("--no-record", action="store_true", help="Do not append the results to --results.")
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "MODE", "SESSIONS"), help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", default="", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def load_models(count):
+    with open(os.path.join(FIXTURES_DIR, "models.csv"), newline='', encoding='utf-8') as f:
+        models = [row['Model'] for row in csv.DictReader(f)]
+    return [models[i % len(models)] for i in range(count)]
+
+
+# --- One run, inside the child process ---
+# Prints one JSON line with the wall time of the scraping itself (imports and
+# browser start-up excluded), the CPU time this process had used before it
+# started, the status counts and the per-stage p50s.
+def run_child(args):
+    from amazon_scraper import scrape_model
+    from fetchers import PagePacer, create_driver, create_fetcher
+    from pipeline import run_pipeline
+    from run_metrics import RunMetrics, percentile
+    from worker_pool import run_worker_pool
+
+    backend, mode, sessions = args.child[0], args.child[1], int(args.child[2])
+    models = load_models(args.models)
+    metrics = RunMetrics()
+    statuses = {}
+    make_driver = functools.partial(create_driver, args.chromedriver, lean=not args.full_browser)
+
+    def make_fetcher():
+        return create_fetcher(backend, make_driver, pacer=PagePacer(pauses=False, metrics=metrics), metrics=metrics,
+                              recycle_pages=args.recycle_pages)
+
+    def on_result(laptop_data, status):
+        statuses[status] = statuses.get(status, 0) + 1
+
+    out = sys.stdout
+    fetchers = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            if mode == "sequential":
+                fetchers.append(make_fetcher())
+            elif mode == "pipeline":
+                for _ in range(sessions):
+                    fetchers.append(make_fetcher())
+            startup_cpu = time.process_time()
+            started = time.perf_counter()
+            if mode == "sequential":
+                for model_name in models:
+                    on_result(*scrape_model(fetchers[0], model_name, base_url=args.base_url, metrics=metrics))
+            elif mode == "pool":
+                run_worker_pool(models, sessions, make_fetcher, on_result, base_url=args.base_url, metrics=metrics)
+            else:
+                run_pipeline(models, fetchers, on_result, base_url=args.base_url, queue_size=8, metrics=metrics)
+            elapsed = time.perf_counter() - started
+            # The worker pool carries on when fetch sessions fail to start.
+            if sum(statuses.values()) != len(models):
+                raise RuntimeError(f"only {sum(statuses.values())} of {len(models)} models finished")
+        except Exception as e:
+            out.write(json.dumps({'error': str(e).splitlines()[0] if str(e) else type(e).__name__}) + "\n")
+            return
+        finally:
+            for fetcher in fetchers:
+                fetcher.close()
+
+    stages = {stage: round(percentile(sorted(values), 0.5), 6) for stage, values in metrics.durations.items()}
+    out.write(json.dumps({'elapsed': elapsed, 'startup_cpu': startup_cpu, 'statuses': statuses,
+                          'stage_p50': stages}) + "\n")
+
+
+# --- Driver side ---
+
+def current_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}+dirty" if dirty else commit
+
+
+# Runs one combination in a child process and measures it. Returns the result
+# dict, or None (after printing why) when the run failed.
+def run_one(args, base_url, backend, mode, sessions):
+    command = [sys.executable, os.path.abspath(__file__), "--child", backend, mode, str(sessions),
+               "--base-url", base_url, "--models", str(args.models), "--chromedriver", args.chromedriver,
+               "--recycle-pages", str(args.recycle_pages)] + (["--full-browser"] if args.full_browser else [])
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    output = process.stdout.read()
+    process.stdout.close()
+    cpu_seconds = peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        _, exit_status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(exit_status)
+        cpu_seconds = usage.ru_utime + usage.ru_stime
+        # ru_maxrss is in KiB on Linux and in bytes on macOS.
+        peak_rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    else:
+        process.wait()
+
+    lines = [line for line in output.splitlines() if line.startswith("{")]
+    child = json.loads(lines[-1]) if lines else {'error': f"benchmark process exited with {process.returncode}"}
+    if 'error' in child:
+        print(f"  {backend:<9}{mode:<11}{sessions:>3}  skipped: {child['error']}")
+        return None
+    return {
+        'backend': backend,
+        'mode': mode,
+        'concurrency': sessions,
+        'models': args.models,
+        'latency_ms': args.latency_ms,
+        'browser': "full" if args.full_browser else "lean",
+        'recycle_pages': args.recycle_pages,
+        'seconds': round(child['elapsed'], 3),
+        'models_per_minute': round(args.models / child['elapsed'] * 60, 1),
+        'cpu_seconds': round(cpu_seconds - child['startup_cpu'], 2) if cpu_seconds is not None else None,
+        'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        'statuses': child['statuses'],
+        'stage_p50': child['stage_p50'],
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_key(result):
+    return (result['backend'], result['mode'], result['concurrency'], result['models'], result['latency_ms'],
+            result.get('browser', "lean"), result.get('recycle_pages', 0))
+
+
+# The recorded run to compare with: the latest one of the same combination on
+# the baseline commit, or on any commit other than this one.
+def find_baseline(history, result, commit, baseline_commit):
+    for previous in reversed(history):
+        if run_key(previous) != run_key(result):
+            continue
+        if baseline_commit and previous['commit'].split("+")[0] != baseline_commit:
+            continue
+        if not baseline_commit and previous['commit'] == commit:
+            continue
+        return previous
+    return None
+
+
+# Relative changes of result against previous, and which of them regressed.
+def compare(result, previous, threshold):
+    changes = []
+    regressed = False
+    checks = [('models/min', 'models_per_minute', -1), ('CPU/model', 'cpu_per_model', 1), ('RSS', 'peak_rss_mb', 1)]
+    for label, field, worse in checks:
+        if field == 'cpu_per_model':
+            new = result['cpu_seconds'] / result['models'] if result['cpu_seconds'] is not None else None
+            old = previous['cpu_seconds'] / previous['models'] if previous.get('cpu_seconds') is not None else None
+        else:
+            new, old = result[field], previous.get(field)
+        if new is None or not old:
+            continue
+        change = (new - old) / old
+        flag = change * worse > threshold
+        regressed = regressed or flag
+        changes.append(f"{label} {change:+.0%}{' REGRESSION' if flag else ''}")
+    return changes, regressed
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    commit = current_commit()
+    history = load_history(args.results)
+
+    site = FixtureSite(latency_ms=args.latency_ms)
+    base_url = site.start()
+    print(f"Fixture site at {base_url}, {args.latency_ms:.0f} ms per page, {args.models} models per run, "
+          f"commit {commit}.\n")
+    print(f"  {'backend':<9}{'mode':<11}{'n':>3}  {'models/min':>10}{'CPU s':>8}{'peak RSS':>10}  statuses / change")
+
+    results = []
+    regressions = 0
+    try:
+        for backend in backends:
+            for sessions in levels:
+                for mode in modes:
+                    if (mode == "sequential") != (sessions == 1):
+                        continue
+                    result = run_one(args, base_url, backend, mode, sessions)
+                    if result is None:
+                        continue
+                    result['commit'] = commit
+                    result['date'] = datetime.datetime.now().isoformat(timespec="seconds")
+                    results.append(result)
+
+                    statuses = ", ".join(f"{status}={count}" for status, count in sorted(result['statuses'].items()))
+                    cpu = f"{result['cpu_seconds']:.1f}" if result['cpu_seconds'] is not None else "n/a"
+                    rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "n/a"
+                    print(f"  {backend:<9}{mode:<11}{sessions:>3}  {result['models_per_minute']:>10.1f}{cpu:>8}"
+                          f"{rss:>10}  {statuses}")
+                    previous = find_baseline(history, result, commit, args.baseline)
+                    if previous:
+                        changes, regressed = compare(result, previous, args.threshold)
+                        regressions += regressed
+                        print(f"  {'':<25}vs {previous['commit']}: {', '.join(changes)}")
+    finally:
+        site.stop()
+
+    print("\nFixture requests: " + ", ".join(f"{kind}={count}" for kind, count in site.requests.items()))
+    if results and not args.no_record:
+        with open(args.results, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        print(f"Results appended to '{args.results}'.")
+    if regressions:
+        print(f"{regressions} runs regressed by more than {args.threshold:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
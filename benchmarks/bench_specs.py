@@ -0,0 +1,97 @@
+import csv
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import build_product_details, extract_specs  # noqa: E402
+
+# --- Spec extraction micro-benchmark ---
+# Builds product_info dicts (what read_product_page returns) from the rows of
+# laptop_models.csv, varied the way product pages vary: the spec keys used
+# (Processor / CPU Model, RAM / Memory / RAM Memory Installed Size, ...),
+# missing, empty or 'N/A' entries, "8 GB RAM" style values, and byline or
+# title text for the brand. Runs build_product_details and extract_specs over
+# all of them, checks that every output field is identical, then prints the
+# timings of both.
+#
+#   python benchmarks/bench_specs.py [laptop_models.csv] [variants per row]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GRAPHICS_VALUES = [
+    "NVIDIA RTX 3050", "NVIDIA GeForce RTX 4060", "nvidia gtx 1650", "AMD Radeon Graphics", "AMD Radeon RX 6500M",
+    "Intel Iris Xe Graphics", "Intel UHD Graphics", "Integrated Graphics", "Dedicated", "4GB Graph", "", "N/A",
+]
+BYLINES = ["Visit the HP Store", "Brand: Lenovo", "ASUS", "Xyz Computers", "123 Store", "Microsoft Surface Store", None]
+
+
+def load_rows(csv_path):
+    with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+        return [row for row in csv.DictReader(f) if row.get('Model')]
+
+
+def maybe(rng, specs, keys, value):
+    choice = rng.random()
+    if choice < 0.15:
+        return
+    key = rng.choice(keys)
+    if choice < 0.25:
+        specs[key] = ""
+    elif choice < 0.3:
+        specs[key] = "N/A"
+    else:
+        specs[key] = value
+
+
+def product_infos(rows, variants, seed=7):
+    rng = random.Random(seed)
+    cases = []
+    for row in rows:
+        for _ in range(variants):
+            specs = {}
+            brand = row['Name'].split()[0] if row.get('Name') else ""
+            maybe(rng, specs, ["Brand"], rng.choice([brand, brand.upper(), "Generic", ""]))
+            maybe(rng, specs, ["Processor", "CPU Model"], rng.choice([row['Processor'], row['Processor'].upper(),
+                                                                      "Apple M2 Pro chip", "Snapdragon X Elite"]))
+            ram = row['RAM'] or "8GB"
+            maybe(rng, specs, ["RAM", "Memory", "RAM Memory Installed Size"],
+                  rng.choice([ram, ram.replace("GB", " GB RAM"), f"{ram} DDR5 RAM", "16 GB"]))
+            maybe(rng, specs, ["Graphics Coprocessor", "Graphics Card Description", "GPU"],
+                  rng.choice([row['graphics card']] + GRAPHICS_VALUES))
+            title = rng.choice([row['Model'], row.get('Name', ''), "", f"{row['Model']} NVIDIA RTX 4050"])
+            info = {'price': row.get('Cprice', 'N/A'), 'rating': '4.1', 'specs': specs,
+                    'brand_text': rng.choice(BYLINES + [row.get('Name')])}
+            cases.append((info, title))
+    return cases
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(REPO_DIR, "laptop_models.csv")
+    variants = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cases = product_infos(load_rows(csv_path), variants)
+
+    started = time.perf_counter()
+    expected = [build_product_details(info, title) for info, title in cases]
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = [extract_specs(info, title) for info, title in cases]
+    rules_seconds = time.perf_counter() - started
+
+    mismatches = [(case, got, want) for case, got, want in zip(cases, actual, expected) if got != want]
+    print(f"{len(cases)} product pages")
+    print(f"build_product_details: {reference_seconds * 1000:8.1f} ms ({len(cases) / reference_seconds:10.0f} pages/s)")
+    print(f"extract_specs:         {rules_seconds * 1000:8.1f} ms ({len(cases) / rules_seconds:10.0f} pages/s)")
+    print(f"Speed-up: {reference_seconds / rules_seconds:.1f}x")
+    print(f"Parity: {len(cases) - len(mismatches)}/{len(cases)} rows identical")
+    for case, got, want in mismatches[:5]:
+        print(f"  {case}\n    got  {got}\n    want {want}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import ASIN_PATTERN  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Stand-in bodies for the images, scripts, styles and ad frames the fixture pages
+# reference, so a browser downloads roughly what it would on the real site.
+ASSETS = {
+    '.jpg': ("image/jpeg", b"\xff\xd8\xff\xe0" + b"\0" * 40000),
+    '.png': ("image/png", b"\x89PNG\r\n\x1a\n" + b"\0" * 20000),
+    '.gif': ("image/gif", b"GIF89a\x01\x00\x01\x00\x00\x00\x00;"),
+    '.js': ("application/javascript", b"/* fixture */ var ue_t0 = Date.now();\n" * 200),
+    '.css': ("text/css", b".a-section{margin:0}\n" * 500),
+    '.html': ("text/html; charset=utf-8", b"<html><body><div class='ad'>ad</div></body></html>"),
+}
+
+
+# --- Fixture site ---
+# Serves the recorded pages in fixtures/ the way the scraper requests them:
+# /s?k=<query> returns the search page whose keywords appear in the query (or
+# the fallback page with unrelated results), /<slug>/dp/<ASIN>/ returns the
+# product page recorded for that ASIN. Pages get an ETag and answer
+# If-None-Match with 304, like the real site. latency_ms delays every page (not
+# the assets) to stand in for network and server time. Request counts per kind
+# are kept in `requests`.
+class FixtureSite:
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency_ms=0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency_ms / 1000.0
+        with open(os.path.join(fixtures_dir, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.search_pages = [(entry['keywords'], self._read(entry['page'])) for entry in manifest['search']]
+        self.search_fallback = self._read(manifest['search_fallback'])
+        self.product_pages = {asin: self._read(page) for asin, page in manifest['products'].items()}
+        self.requests = {'search': 0, 'product': 0, 'asset': 0, 'missing': 0}
+        self.lock = threading.Lock()
+
+    def _read(self, name):
+        with open(os.path.join(self.fixtures_dir, name), "rb") as f:
+            return f.read()
+
+    def _count(self, kind):
+        with self.lock:
+            self.requests[kind] += 1
+
+    # (kind, content type, body) for a request path; body is None for a 404.
+    def resolve(self, path):
+        parts = urlsplit(path)
+        if parts.path == "/s":
+            query = " ".join(parse_qs(parts.query).get('k', [""])).lower()
+            for keywords, body in self.search_pages:
+                if any(keyword in query for keyword in keywords):
+                    return 'search', "text/html; charset=utf-8", body
+            return 'search', "text/html; charset=utf-8", self.search_fallback
+        asin_match = ASIN_PATTERN.search(parts.path)
+        if asin_match:
+            body = self.product_pages.get(asin_match.group(1))
+            return ('product' if body else 'missing'), "text/html; charset=utf-8", body
+        extension = os.path.splitext(parts.path)[1].lower()
+        if extension in ASSETS:
+            content_type, body = ASSETS[extension]
+            return 'asset', content_type, body
+        return 'missing', "text/plain", None
+
+    def start(self, port=0):
+        site = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                kind, content_type, body = site.resolve(self.path)
+                site._count(kind)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if kind in ('search', 'product') and site.latency:
+                    time.sleep(site.latency)
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Runs the fixture site on its own, e.g. to point scrape_laptops.py at it:
+#   python benchmarks/fixture_server.py --port 8000
+#   python scrape_laptops.py --base-url http://127.0.0.1:8000 --input benchmarks/fixtures/models.csv ...
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the recorded Amazon pages in benchmarks/fixtures.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    site = FixtureSite(latency_ms=args.latency_ms)
+    print(f"Serving fixture pages at {site.start(args.port)} (Ctrl+C to stop).")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
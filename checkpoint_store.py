@@ -0,0 +1,77 @@
+import sqlite3
+import threading
+import time
+
+from amazon_scraper import STATUS_DONE, STATUS_NO_MATCH
+
+# A model with one of these statuses is never scraped again. Timeouts and errors
+# are retried on the next run until they have used up their attempts.
+FINISHED_STATUSES = {STATUS_DONE, STATUS_NO_MATCH}
+
+
+# --- Persistent checkpoint store ---
+# One row per model string with its latest status and how many times it has
+# been attempted, so an interrupted run can pick up where it stopped. Models are
+# recorded from the output sink's flush timer too, hence the lock.
+class CheckpointStore:
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.skipped = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " model TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def _is_finished(self, status, attempts):
+        return status in FINISHED_STATUSES or attempts >= self.max_attempts
+
+    def is_finished(self, model_name):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, attempts FROM checkpoints WHERE model = ?", (model_name,)
+            ).fetchone()
+        return row is not None and self._is_finished(*row)
+
+    # Filters the (possibly streamed) model list lazily; `skipped` counts the
+    # models left out because they are already finished.
+    def pending_models(self, laptop_models):
+        for model_name in laptop_models:
+            if self.is_finished(model_name):
+                self.skipped += 1
+            else:
+                yield model_name
+
+    # True if this attempt's status will finish the model, i.e. its row should
+    # be written to the output before the attempt is recorded.
+    def finishes(self, model_name, status):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT attempts FROM checkpoints WHERE model = ?", (model_name,)
+            ).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        return self._is_finished(status, attempts)
+
+    def record(self, model_name, status):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO checkpoints (model, status, attempts, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(model) DO UPDATE SET status = excluded.status, "
+                "attempts = attempts + 1, updated_at = excluded.updated_at",
+                (model_name, status, time.time()),
+            )
+
+    def status_counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM checkpoints GROUP BY status").fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
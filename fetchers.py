@@ -0,0 +1,371 @@
+import random
+import time
+
+import requests
+from lxml.etree import ParserError
+from requests.adapters import HTTPAdapter
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from amazon_scraper import MAX_SEARCH_CARDS
+from html_page import HtmlPage
+from run_metrics import metric_span
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36"
+
+# Elements a page must contain before extraction can run on it.
+SEARCH_PAGE_LOCATOR = (By.CSS_SELECTOR, 'div[data-component-type="s-search-result"]')
+PRODUCT_PAGE_LOCATOR = (By.ID, 'productTitle')
+
+# --- Readiness and snapshot for live browser pages ---
+# A browser page counts as ready once every `required` selector matches and
+# either every `optional` one does too or the document has finished loading.
+# The page is then pulled out in one execute_script call: just the result cards
+# (`fragment`) for search pages, the whole document minus scripts and styles for
+# product pages. It is parsed locally, so extraction makes no WebDriver calls.
+SEARCH_PAGE_READINESS = {
+    'required': ['div[data-component-type="s-search-result"]'],
+    'optional': [],
+    'fragment': 'div[data-component-type="s-search-result"]',
+}
+PRODUCT_PAGE_READINESS = {
+    'required': ['#productTitle'],
+    'optional': [
+        '#corePrice_feature_div, #priceblock_ourprice, .reinventPricePriceToPayMargin, span.a-offscreen',
+        '#averageCustomerReviews, #acrCustomerReviewLink',
+        '#productDetails_techSpec_section_1, #detailBullets_feature_div, table.a-normal.a-spacing-micro',
+    ],
+    'fragment': None,
+}
+
+READY_SCRIPT = """
+const required = arguments[0], optional = arguments[1];
+if (!required.every(selector => document.querySelector(selector))) return false;
+return document.readyState === 'complete' || optional.every(selector => document.querySelector(selector));
+"""
+
+SNAPSHOT_SCRIPT = """
+const fragment = arguments[0], limit = arguments[1];
+if (fragment) {
+    const parts = Array.from(document.querySelectorAll(fragment)).slice(0, limit).map(el => el.outerHTML);
+    return [location.href, '<html><body>' + parts.join('') + '</body></html>'];
+}
+const root = document.documentElement.cloneNode(true);
+root.querySelectorAll('script, style, noscript, iframe, svg, link').forEach(el => el.remove());
+return [location.href, root.outerHTML];
+"""
+
+# Markers of Amazon's robot-check page.
+CAPTCHA_MARKERS = ('/errors/validatecaptcha', 'enter the characters you see below', 'type the characters you see in this image')
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+# A page that loaded but cannot be used: a CAPTCHA, or a 200 response without
+# the elements extraction needs. Only these are worth retrying in a browser;
+# failed requests and error or throttling statuses are not.
+class IncompletePageException(TimeoutException):
+    pass
+
+
+def looks_like_captcha(html):
+    html_lower = html.lower()
+    return any(marker in html_lower for marker in CAPTCHA_MARKERS)
+
+
+# --- Lean browser profile ---
+# Extraction only reads the DOM, so a lean session never downloads images, media
+# or fonts, nor the ad and tracking requests below, and driver.get returns once
+# the HTML is parsed ('eager') instead of waiting for every subresource; the
+# fetcher then polls for the elements it needs as before. Stylesheets are
+# blocked too: pages are read from the parsed snapshot, never as rendered text.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.css*",
+    "*amazon-adsystem.com*", "*/aax2/*", "*fls-eu.amazon.*", "*fls-na.amazon.*", "*fls-fe.amazon.*",
+    "*unagi.amazon.*", "*unagi-na.amazon.*", "*/uedata*", "*/1/batch/1/OP/*", "*doubleclick.net*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*googlesyndication.com*", "*facebook.net*",
+]
+
+
+def create_driver(chrome_driver_path, lean=True):
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    if lean:
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+    service = Service(executable_path=chrome_driver_path)
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+def check_rss_support():
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        raise ImportError("Recycling browser sessions by memory needs the 'psutil' package (pip install psutil).")
+
+
+# Resident memory of chromedriver and every browser process under it, in MB, or
+# None when it cannot be read. Memory shared between Chrome's processes is
+# counted once per process, so this overstates the footprint somewhat.
+def browser_rss_mb(driver):
+    import psutil
+
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+    except (psutil.Error, AttributeError):
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+# --- Pacing between page loads ---
+# Every fetcher owns one pacer. It performs the random pauses the scraper has
+# always taken, and can additionally cap how often that session loads a page.
+# Replay runs, which never hit the network, switch the pauses off.
+class PagePacer:
+    def __init__(self, min_interval=0.0, pauses=True, metrics=None):
+        self.min_interval = min_interval
+        self.pauses = pauses
+        self.metrics = metrics
+        self.last_load = None
+
+    def before_load(self, url=None):
+        if self.min_interval and self.last_load is not None:
+            remaining = self.min_interval - (time.monotonic() - self.last_load)
+            if remaining > 0:
+                with metric_span(self.metrics, "sleep"):
+                    time.sleep(remaining)
+        self.last_load = time.monotonic()
+
+    def after_load(self, url, throttled):
+        pass
+
+    def pause(self, low, high):
+        if self.pauses:
+            with metric_span(self.metrics, "sleep"):
+                time.sleep(random.uniform(low, high))
+
+
+# --- Fetch backends ---
+# A fetcher turns a URL into a page object that the extraction code can query
+# with find_element / find_elements. get_search_page and get_product_page raise
+# TimeoutException when the page never shows the elements extraction needs.
+# Every load is reported to the pacer, flagged as throttled when the response
+# was a CAPTCHA, a 429/503 or a page without the required elements.
+
+# A browser session is recycled (quit, and started again on the next load) after
+# recycle_pages page loads, or once chromedriver and its browser processes use
+# more than recycle_rss_mb, so a long run does not keep one ever-growing Chrome.
+# 0 switches either limit off.
+class SeleniumFetcher:
+    def __init__(self, make_driver, pacer=None, lazy=False, metrics=None, recycle_pages=0, recycle_rss_mb=0):
+        self.make_driver = make_driver
+        self.pacer = pacer or PagePacer()
+        self.metrics = metrics
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        if recycle_rss_mb:
+            check_rss_support()
+        self.session_pages = 0
+        self.driver = None
+        if not lazy:
+            self._start()
+
+    def _start(self):
+        with metric_span(self.metrics, "browser_start"):
+            self.driver = self.make_driver()
+        self.session_pages = 0
+
+    def _recycle_reason(self):
+        if self.recycle_pages and self.session_pages >= self.recycle_pages:
+            return f"{self.session_pages} pages"
+        if self.recycle_rss_mb:
+            rss_mb = browser_rss_mb(self.driver)
+            if rss_mb is not None and rss_mb >= self.recycle_rss_mb:
+                return f"reaching {rss_mb:.0f} MB"
+        return None
+
+    def _load(self, url, readiness):
+        if self.driver is not None:
+            reason = self._recycle_reason()
+            if reason:
+                print(f"  Recycling the browser session after {reason}.")
+                self.close()
+                if self.metrics:
+                    self.metrics.count("browser_recycle")
+        if self.driver is None:
+            self._start()
+        self.session_pages += 1
+        self.pacer.before_load(url)
+        try:
+            with metric_span(self.metrics, "browser_load"):
+                self.driver.get(url)
+                WebDriverWait(self.driver, 20, poll_frequency=0.2).until(
+                    lambda driver: driver.execute_script(READY_SCRIPT, readiness['required'], readiness['optional'])
+                )
+        except TimeoutException:
+            self.pacer.after_load(url, throttled=True)
+            raise
+        self.pacer.after_load(url, throttled=False)
+        with metric_span(self.metrics, "browser_snapshot"):
+            current_url, html = self.driver.execute_script(SNAPSHOT_SCRIPT, readiness['fragment'], MAX_SEARCH_CARDS)
+        with metric_span(self.metrics, "html_parse"):
+            return HtmlPage(html, current_url)
+
+    def get_search_page(self, url):
+        return self._load(url, SEARCH_PAGE_READINESS)
+
+    def get_product_page(self, url):
+        return self._load(url, PRODUCT_PAGE_READINESS)
+
+    def close(self):
+        if self.driver:
+            self.driver.quit()
+            self.driver = None
+            print("  Browser closed.")
+
+
+class HttpFetcher:
+    def __init__(self, pacer=None, pool_size=4, timeout=20, metrics=None):
+        self.pacer = pacer or PagePacer()
+        self.metrics = metrics
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-IN,en;q=0.9",
+        })
+
+    def _load(self, url, locator, headers=None):
+        self.pacer.before_load(url)
+        try:
+            with metric_span(self.metrics, "http_request"):
+                response = self.session.get(url, timeout=self.timeout, headers=headers)
+        except requests.RequestException as e:
+            raise TimeoutException(f"HTTP request failed for {url}: {e}")
+        if response.status_code == 304 and headers:
+            self.pacer.after_load(url, throttled=False)
+            return None, response
+        if response.status_code != 200:
+            self.pacer.after_load(url, throttled=response.status_code in THROTTLE_STATUS_CODES)
+            raise TimeoutException(f"HTTP {response.status_code} for {url}")
+        if looks_like_captcha(response.text):
+            self.pacer.after_load(url, throttled=True)
+            raise IncompletePageException(f"CAPTCHA page returned for {url}")
+        try:
+            with metric_span(self.metrics, "html_parse"):
+                page = HtmlPage(response.text, response.url)
+        except ParserError:
+            raise IncompletePageException(f"Empty page returned for {url}")
+        if not page.has_element(*locator):
+            self.pacer.after_load(url, throttled=True)
+            raise IncompletePageException(f"Required element {locator[1]} missing from {url}")
+        self.pacer.after_load(url, throttled=False)
+        return page, response
+
+    def get_search_page(self, url):
+        return self._load(url, SEARCH_PAGE_LOCATOR)[0]
+
+    def get_product_page(self, url):
+        return self._load(url, PRODUCT_PAGE_LOCATOR)[0]
+
+    # Conditional GET with the validators from the last fetch of url. Returns
+    # (page, etag, last_modified); page is None if the server answered 304 Not
+    # Modified.
+    def get_product_page_if_changed(self, url, etag=None, last_modified=None):
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        page, response = self._load(url, PRODUCT_PAGE_LOCATOR, headers=headers or None)
+        if page is None:
+            return None, etag, last_modified
+        return page, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    def close(self):
+        self.session.close()
+
+
+# HTTP first; the browser is only started (once, lazily) for pages that come
+# back without the required elements, e.g. CAPTCHA or client-rendered pages.
+# Failed requests and error or throttling statuses are raised as they are: the
+# pacer has already slowed down, and a browser would hit the host right away.
+# Every fallback is counted as browser_fallback in the run metrics.
+class FallbackFetcher:
+    def __init__(self, make_driver, pacer=None, pool_size=4, metrics=None, recycle_pages=0, recycle_rss_mb=0):
+        self.pacer = pacer or PagePacer()
+        self.http = HttpFetcher(pacer=self.pacer, pool_size=pool_size, metrics=metrics)
+        self.browser = SeleniumFetcher(make_driver, pacer=self.pacer, lazy=True, metrics=metrics,
+                                       recycle_pages=recycle_pages, recycle_rss_mb=recycle_rss_mb)
+        self.metrics = metrics
+        self.browser_unavailable = False
+
+    def _load(self, url, http_get, browser_get):
+        try:
+            return http_get(url)
+        except IncompletePageException as e:
+            if self.browser_unavailable:
+                raise
+            print(f"  HTTP fetch unusable ({e}). Falling back to Chrome.")
+            if self.metrics:
+                self.metrics.count("browser_fallback")
+            try:
+                return browser_get(url)
+            except TimeoutException:
+                raise
+            except Exception as browser_error:
+                if self.browser.driver is None:
+                    # Chrome could not be started; stay on HTTP for the rest of the run.
+                    print(f"  Could not open Chrome browser for fallback: {browser_error}")
+                    self.browser_unavailable = True
+                    raise e
+                raise
+
+    def get_search_page(self, url):
+        return self._load(url, self.http.get_search_page, self.browser.get_search_page)
+
+    def get_product_page(self, url):
+        return self._load(url, self.http.get_product_page, self.browser.get_product_page)
+
+    def get_product_page_if_changed(self, url, etag=None, last_modified=None):
+        return self._load(url, lambda url: self.http.get_product_page_if_changed(url, etag, last_modified),
+                          lambda url: (self.browser.get_product_page(url), None, None))
+
+    def close(self):
+        self.http.close()
+        self.browser.close()
+
+
+def create_fetcher(backend, make_driver, pacer=None, metrics=None, recycle_pages=0, recycle_rss_mb=0):
+    if backend == "selenium":
+        return SeleniumFetcher(make_driver, pacer=pacer, metrics=metrics, recycle_pages=recycle_pages,
+                               recycle_rss_mb=recycle_rss_mb)
+    if backend == "http":
+        return FallbackFetcher(make_driver, pacer=pacer, metrics=metrics, recycle_pages=recycle_pages,
+                               recycle_rss_mb=recycle_rss_mb)
+    raise ValueError(f"Unknown fetch backend: {backend}")
@@ -0,0 +1,86 @@
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+
+# --- Parsed HTML pages with a WebDriver-style lookup API ---
+# The extraction code only calls find_element / find_elements, .text and
+# get_attribute, so a page parsed locally with lxml can be handed to it in place
+# of a live driver. Lookups follow Selenium: find_element raises
+# NoSuchElementException and matches come back in document order.
+
+_selector_cache = {}
+
+
+def _compile_selector(by, value):
+    key = (by, value)
+    selector = _selector_cache.get(key)
+    if selector is None:
+        if by == By.ID:
+            css = f'[id="{value}"]'
+        elif by == By.TAG_NAME:
+            css = value
+        elif by == By.CSS_SELECTOR:
+            css = value
+        else:
+            raise ValueError(f"Unsupported locator strategy for HTML pages: {by}")
+        selector = CSSSelector(css)
+        _selector_cache[key] = selector
+    return selector
+
+
+class HtmlElement:
+    def __init__(self, element, page):
+        self._element = element
+        self._page = page
+
+    @property
+    def text(self):
+        return " ".join(self._element.text_content().split())
+
+    def get_attribute(self, name):
+        if name == 'textContent':
+            return self._element.text_content()
+        if name == 'innerHTML':
+            inner = self._element.text or ""
+            for child in self._element:
+                inner += lxml.html.tostring(child, encoding='unicode')
+            return inner
+        value = self._element.get(name)
+        if value is not None and name in ('href', 'src'):
+            return urljoin(self._page.url, value)
+        return value
+
+    def find_element(self, by, value):
+        return self._page._first(self._element, by, value)
+
+    def find_elements(self, by, value):
+        return self._page._all(self._element, by, value)
+
+
+class HtmlPage:
+    def __init__(self, html, url):
+        self.url = url
+        self.page_source = html
+        self._root = lxml.html.fromstring(html)
+
+    def _all(self, root, by, value):
+        return [HtmlElement(el, self) for el in _compile_selector(by, value)(root)]
+
+    def _first(self, root, by, value):
+        matches = _compile_selector(by, value)(root)
+        if not matches:
+            raise NoSuchElementException(f"Unable to locate element: {value}")
+        return HtmlElement(matches[0], self)
+
+    def find_element(self, by, value):
+        return self._first(self._root, by, value)
+
+    def find_elements(self, by, value):
+        return self._all(self._root, by, value)
+
+    def has_element(self, by, value):
+        return bool(_compile_selector(by, value)(self._root))
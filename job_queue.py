@@ -0,0 +1,265 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from amazon_scraper import DEFAULT_BASE_URL, STATUS_ERROR, empty_laptop_record, scrape_model
+from checkpoint_store import FINISHED_STATUSES
+
+STATE_PENDING = "pending"
+STATE_LEASED = "leased"
+STATE_FINISHED = "finished"
+
+
+# --- Shared SQLite job queue for coordinator / worker runs ---
+# The coordinator streams the input models into the queue and collects the
+# results; any number of worker processes lease jobs, scrape them and report the
+# rows back. A lease is only valid for lease_seconds: a job whose worker crashed
+# or hung becomes visible again once its lease expires and is picked up by
+# another worker. Every lease counts as an attempt, so a model that keeps
+# killing its worker is finished as an error after max_attempts. Results are
+# only accepted from the worker that holds the lease; a worker whose lease was
+# taken over reports into the void.
+#
+# SQLite serialises writers with file locks, so all processes must open the
+# queue on a filesystem with working locks (a local disk, or a share that
+# supports them). Each operation is one short transaction.
+class JobQueue:
+    def __init__(self, path, lease_seconds=600, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " model TEXT NOT NULL UNIQUE,"
+            " state TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " owner TEXT,"
+            " lease_expires REAL,"
+            " status TEXT,"
+            " laptop_data TEXT,"
+            " exported INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _transaction(self, work):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # --- Coordinator side ---
+
+    # Adds models in batches of batch_size, each committed on its own so workers
+    # can start on the first batch while the rest of the input is still read.
+    # Models already in the queue (from an earlier coordinator run) are kept.
+    def enqueue(self, laptop_models, batch_size=1000):
+        added = 0
+        batch = []
+        self._transaction(lambda: self.conn.execute("DELETE FROM meta WHERE key = 'input_complete'"))
+
+        def insert():
+            now = time.time()
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO jobs (model, state, updated_at) VALUES (?, ?, ?)",
+                [(model_name, STATE_PENDING, now) for model_name in batch],
+            )
+            return cursor.rowcount
+
+        for model_name in laptop_models:
+            batch.append(model_name)
+            if len(batch) >= batch_size:
+                added += self._transaction(insert)
+                batch = []
+        if batch:
+            added += self._transaction(insert)
+        self._transaction(lambda: self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('input_complete', '1')"
+        ))
+        return added
+
+    # Finished, not yet exported results after job id `after`, in input order,
+    # stopping at the first job that is still open.
+    def finished_results(self, after, limit=500):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, model, state, status, laptop_data FROM jobs "
+                "WHERE id > ? AND exported = 0 ORDER BY id LIMIT ?", (after, limit)
+            ).fetchall()
+        results = []
+        for job_id, model_name, state, status, laptop_data in rows:
+            if state != STATE_FINISHED:
+                break
+            laptop_data = json.loads(laptop_data) if laptop_data else empty_laptop_record(model_name)
+            results.append((job_id, laptop_data, status))
+        return results
+
+    def mark_exported(self, job_id):
+        self._transaction(lambda: self.conn.execute("UPDATE jobs SET exported = 1 WHERE id = ?", (job_id,)))
+
+    # --- Worker side ---
+
+    # Leases up to `count` jobs for owner: pending ones, and leased ones whose
+    # lease has expired. Expired jobs that are out of attempts stay with their
+    # last owner for one more lease_seconds, so a late result still counts, and
+    # are finished as errors after that.
+    def lease(self, owner, count=1):
+        def work():
+            now = time.time()
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, status = ?, owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (STATE_FINISHED, STATUS_ERROR, now, STATE_LEASED, now - self.lease_seconds, self.max_attempts),
+            )
+            rows = self.conn.execute(
+                "SELECT id, model FROM jobs WHERE state = ? OR (state = ? AND lease_expires < ? AND attempts < ?) "
+                "ORDER BY id LIMIT ?", (STATE_PENDING, STATE_LEASED, now, self.max_attempts, count)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET state = ?, owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                [(STATE_LEASED, owner, now + self.lease_seconds, now, job_id) for job_id, _ in rows],
+            )
+            return rows
+
+        return self._transaction(work)
+
+    # Stores the result of a leased job. Finished statuses (and the last
+    # attempt) close the job; anything else puts it back in the queue. Returns
+    # False, changing nothing, when owner no longer holds the lease: the job was
+    # finished, or re-leased to another worker after this one's lease expired.
+    def complete(self, job_id, owner, laptop_data, status):
+        def work():
+            row = self.conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ? AND state = ? AND owner = ?", (job_id, STATE_LEASED, owner)
+            ).fetchone()
+            if row is None:
+                return False
+            if status in FINISHED_STATUSES or row[0] >= self.max_attempts:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET state = ?, status = ?, laptop_data = ?, lease_expires = NULL, updated_at = ? "
+                    "WHERE id = ? AND state = ? AND owner = ?",
+                    (STATE_FINISHED, status, json.dumps(laptop_data), time.time(), job_id, STATE_LEASED, owner),
+                )
+            else:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET state = ?, status = ?, owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE id = ? AND state = ? AND owner = ?",
+                    (STATE_PENDING, status, time.time(), job_id, STATE_LEASED, owner),
+                )
+            return cursor.rowcount == 1
+
+        return self._transaction(work)
+
+    # True once the coordinator has queued the whole input and every job is
+    # finished, i.e. a worker has nothing left to wait for.
+    def drained(self):
+        with self.lock:
+            input_complete = self.conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'input_complete'"
+            ).fetchone() is not None
+            open_jobs = self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state != ?", (STATE_FINISHED,)
+            ).fetchone()[0]
+        return input_complete and open_jobs == 0
+
+    def state_counts(self):
+        with self.lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# --- Coordinator loop ---
+# Hands finished rows to on_result(job_id, row, status) in input order until
+# every queued job has been exported, printing the queue state every
+# report_interval seconds.
+def run_coordinator(job_queue, on_result, poll_interval=2.0, report_interval=60):
+    cursor = 0
+    last_report = 0.0
+    while True:
+        # Checked first: once everything is finished, the results read next
+        # are the last ones.
+        drained = job_queue.drained()
+        results = job_queue.finished_results(cursor)
+        for job_id, laptop_data, status in results:
+            on_result(job_id, laptop_data, status)
+            cursor = job_id
+        if results:
+            continue
+        if drained:
+            break
+        if time.monotonic() - last_report >= report_interval:
+            counts = job_queue.state_counts()
+            print("Queue: " + ", ".join(f"{state}={count}" for state, count in sorted(counts.items())))
+            last_report = time.monotonic()
+        time.sleep(poll_interval)
+
+
+# --- Queue worker ---
+# Runs num_threads fetch sessions in this process. Each leases one job at a
+# time, scrapes it with scrape_model and reports the row back. Workers wait
+# while the queue is empty but the coordinator is still adding models, or other
+# workers' leases may still expire, and stop once the queue is drained.
+def run_queue_worker(job_queue, num_threads, make_fetcher, base_url=DEFAULT_BASE_URL, asin_index=None,
+                     product_memo=None, poll_interval=5.0, metrics=None):
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    completed = [0]
+    completed_lock = threading.Lock()
+
+    def worker(thread_id):
+        owner = f"{worker_name}:{thread_id}"
+        fetcher = None
+        try:
+            try:
+                fetcher = make_fetcher()
+            except Exception as e:
+                print(f"[{owner}] Could not start fetch session: {e}")
+                return
+            print(f"[{owner}] Fetch session started.")
+            while True:
+                leased = job_queue.lease(owner)
+                if not leased:
+                    if job_queue.drained():
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                job_id, model_name = leased[0]
+                print(f"\n[{owner}] --- Scraping data for job {job_id}: {model_name} ---")
+                try:
+                    laptop_data, status = scrape_model(fetcher, model_name, base_url=base_url,
+                                                       asin_index=asin_index, product_memo=product_memo,
+                                                       metrics=metrics)
+                except Exception as e:
+                    print(f"[{owner}] Unexpected error while processing '{model_name}': {e}")
+                    laptop_data, status = empty_laptop_record(model_name), STATUS_ERROR
+                if not job_queue.complete(job_id, owner, laptop_data, status):
+                    print(f"[{owner}] Lease on job {job_id} was lost; result for '{model_name}' dropped.")
+                    continue
+                with completed_lock:
+                    completed[0] += 1
+        finally:
+            if fetcher:
+                fetcher.close()
+
+    threads = [threading.Thread(target=worker, args=(thread_id + 1,), daemon=True) for thread_id in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return completed[0]
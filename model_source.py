@@ -0,0 +1,58 @@
+import hashlib
+import zlib
+
+import pandas as pd
+
+
+# --- Streaming model list ---
+# The input CSV is read in chunks of chunk_size rows and models are handed to
+# the scraping loop one at a time, so startup does not depend on the size of
+# the file. Empty cells and exact repeats of a model string already read are
+# skipped. Only an 8-byte digest is remembered per distinct model of the shard.
+
+def parse_shard(text):
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected --shard k/N, e.g. 2/4, got '{text}'.")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard {text} is out of range; k must be between 1 and N.")
+    return index, count
+
+
+# Shard k of N gets the models whose CRC32 is k-1 modulo N. The assignment only
+# depends on the model string, so it stays the same when rows are added to or
+# reordered in the input, and duplicates always land in the same shard.
+def in_shard(model_name, shard):
+    index, count = shard
+    return count == 1 or zlib.crc32(model_name.encode("utf-8")) % count == index - 1
+
+
+class ModelStream:
+    def __init__(self, csv_path, shard=None, chunk_size=10000):
+        self.csv_path = csv_path
+        self.shard = shard or (1, 1)
+        self.rows_read = 0
+        self.duplicates = 0
+        self.other_shards = 0
+        # Opening the reader parses the header, so a missing file or 'Model'
+        # column is reported before any scraping starts.
+        self.reader = pd.read_csv(csv_path, usecols=['Model'], dtype={'Model': str}, chunksize=chunk_size)
+
+    def __iter__(self):
+        seen = set()
+        with self.reader:
+            for chunk in self.reader:
+                for model_name in chunk['Model']:
+                    self.rows_read += 1
+                    if not isinstance(model_name, str) or not model_name:
+                        continue
+                    if not in_shard(model_name, self.shard):
+                        self.other_shards += 1
+                        continue
+                    digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=8).digest()
+                    if digest in seen:
+                        self.duplicates += 1
+                        continue
+                    seen.add(digest)
+                    yield model_name
@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from amazon_scraper import column_order
+
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def output_format_for(path):
+    extension = os.path.splitext(path.rstrip("/\\"))[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    return "csv"
+
+
+# --- Buffered output sinks ---
+# Rows are buffered and written out in batches, once flush_rows rows are waiting
+# or flush_seconds have passed since the last flush, and on close(). The time
+# limit is kept by a timer thread, so buffered rows do not wait for the next row
+# (e.g. while the scraper backs off). A batch only counts as written once it is on disk
+# (fsync); after that the after_flush callbacks passed with its rows run, which
+# is where the caller marks the models as finished in the checkpoint. A crash
+# can therefore lose buffered rows, but never rows the checkpoint says are done.
+class OutputSink:
+    def __init__(self, path, flush_rows=25, flush_seconds=10.0):
+        self.path = path
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.rows = []
+        self.callbacks = []
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_flush = time.monotonic()
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def write(self, row, after_flush=None):
+        with self.lock:
+            self.rows.append({column: row.get(column, 'N/A') for column in column_order})
+            if after_flush:
+                self.callbacks.append(after_flush)
+            elapsed = time.monotonic() - self.last_flush
+            if len(self.rows) >= self.flush_rows or elapsed >= self.flush_seconds:
+                self._flush()
+            elif self.timer is None:
+                self._start_timer(self.flush_seconds - elapsed)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _start_timer(self, delay):
+        timer = threading.Timer(delay, lambda: self._flush_due(timer))
+        timer.daemon = True
+        self.timer = timer
+        timer.start()
+
+    # Runs on the timer thread. A timer replaced or cancelled by a flush in the
+    # meantime does nothing.
+    def _flush_due(self, timer):
+        with self.lock:
+            if self.timer is not timer:
+                return
+            self.timer = None
+            try:
+                self._flush()
+            except Exception as e:
+                print(f"Error: could not write buffered rows to '{self.path}' ({e}). Retrying on the next flush.")
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.last_flush = time.monotonic()
+        if not self.rows:
+            return
+        self._write_batch(self.rows)
+        self.rows_written += len(self.rows)
+        self.flushes += 1
+        callbacks = self.callbacks
+        self.rows = []
+        self.callbacks = []
+        for callback in callbacks:
+            callback()
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+
+# Line-oriented files (CSV, JSONL). Each batch is rendered to one string and
+# appended with a single write to a file opened in O_APPEND mode. A line left
+# half-written by a crash is cut off when the file is opened again.
+class _LineFileSink(OutputSink):
+    def __init__(self, path, flush_rows=25, flush_seconds=10.0):
+        super().__init__(path, flush_rows, flush_seconds)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            _truncate_partial_line(path)
+        # Measured after the truncation: a torn first batch leaves an empty
+        # file, which still needs its CSV header.
+        self.existed = os.path.exists(path) and os.path.getsize(path) > 0
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _render(self, rows):
+        raise NotImplementedError
+
+    def _write_batch(self, rows):
+        data = self._render(rows).encode("utf-8")
+        while data:
+            written = os.write(self.fd, data)
+            data = data[written:]
+        os.fsync(self.fd)
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+
+def _truncate_partial_line(path):
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                keep = position + newline + 1
+                break
+        else:
+            keep = 0
+        if keep != end:
+            print(f"Warning: '{path}' ends with a partly written row. Dropping {end - keep} bytes.")
+            f.truncate(keep)
+
+
+class CsvSink(_LineFileSink):
+    def __init__(self, path, flush_rows=25, flush_seconds=10.0):
+        super().__init__(path, flush_rows, flush_seconds)
+        self.header_written = self.existed
+
+    def _render(self, rows):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=column_order, lineterminator="\n")
+        if not self.header_written:
+            writer.writeheader()
+            self.header_written = True
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+
+class JsonlSink(_LineFileSink):
+    def _render(self, rows):
+        return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+# Parquet files cannot be appended to, so the output path is a directory (the
+# layout pandas and pyarrow read as one dataset) and every batch becomes its own
+# part file. Parts are written under a temporary name and renamed into place.
+class ParquetSink(OutputSink):
+    def __init__(self, path, flush_rows=500, flush_seconds=60.0):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Parquet output needs the 'pyarrow' package (pip install pyarrow).")
+        super().__init__(path, flush_rows, flush_seconds)
+        os.makedirs(path, exist_ok=True)
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.existed = any(name.endswith(".parquet") for name in os.listdir(path))
+
+    def _write_batch(self, rows):
+        name = f"part-{self.run_id}-{self.flushes:05d}.parquet"
+        tmp_path = os.path.join(self.path, f".{name}.tmp")
+        pd.DataFrame(rows, columns=column_order).to_parquet(tmp_path, index=False)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+
+def create_output_sink(path, output_format=None, flush_rows=None, flush_seconds=None):
+    output_format = output_format or output_format_for(path)
+    if output_format == "csv":
+        sink_class = CsvSink
+    elif output_format == "jsonl":
+        sink_class = JsonlSink
+    elif output_format == "parquet":
+        sink_class = ParquetSink
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+    options = {}
+    if flush_rows is not None:
+        options['flush_rows'] = flush_rows
+    if flush_seconds is not None:
+        options['flush_seconds'] = flush_seconds
+    return sink_class(path, **options)
+
+
+# Reads back the rows of an output written by one of the sinks above, one dict
+# of strings per row, in the order they were written.
+def read_output_rows(path, output_format=None):
+    output_format = output_format or output_format_for(path)
+    if output_format == "csv":
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif output_format == "jsonl":
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif output_format == "parquet":
+        parts = sorted(name for name in os.listdir(path) if name.endswith(".parquet"))
+        for name in parts:
+            df = pd.read_parquet(os.path.join(path, name))
+            yield from df.to_dict('records')
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from fetchers import PRODUCT_PAGE_LOCATOR, SEARCH_PAGE_LOCATOR
+from html_page import HtmlPage
+
+
+# --- On-disk HTML response cache ---
+# Raw page HTML is stored gzip-compressed under the SHA-256 of its content, so
+# identical pages fetched from different URLs share one blob. A SQLite index
+# maps each URL to its blob with the fetch time (for the TTL) and the last
+# access time (for LRU eviction once the blobs exceed max_bytes).
+class PageCache:
+    def __init__(self, cache_dir, ttl_seconds=7 * 24 * 3600, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, "blobs"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+        self.conn.commit()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, "blobs", digest[:2], digest + ".html.gz")
+
+    # Returns the cached HTML for url, or None if it is missing or older than
+    # the TTL. allow_stale ignores the TTL (used for replay runs).
+    def get(self, url, allow_stale=False):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT digest, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None or (not allow_stale and time.time() - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            digest = row[0]
+            try:
+                with gzip.open(self._blob_path(digest), "rt", encoding="utf-8") as f:
+                    html = f.read()
+            except OSError:
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self.conn.commit()
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+            self.hits += 1
+            return html
+
+    def put(self, url, html):
+        raw = html.encode("utf-8")
+        # The digest is taken over the HTML itself: gzip output embeds a
+        # timestamp, so hashing it would store identical pages twice.
+        digest = hashlib.sha256(raw).hexdigest()
+        data = gzip.compress(raw, mtime=0)
+        path = self._blob_path(digest)
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            old = self.conn.execute("SELECT digest FROM pages WHERE url = ?", (url,)).fetchone()
+            now = time.time()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, digest, size, fetched_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (url, digest, len(data), now, now),
+            )
+            if old and old[0] != digest:
+                self._drop_blob_if_unused(old[0])
+            self._evict()
+            self.conn.commit()
+
+    def _drop_blob_if_unused(self, digest):
+        if self.conn.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _total_bytes(self):
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM pages)"
+        ).fetchone()[0]
+
+    # Drops least recently used URLs until the stored blobs fit in max_bytes.
+    def _evict(self):
+        total = self._total_bytes()
+        while total > self.max_bytes:
+            row = self.conn.execute(
+                "SELECT url, digest FROM pages ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            url, digest = row
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._drop_blob_if_unused(digest)
+            total = self._total_bytes()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# --- Fetcher wrapper that serves pages from the cache ---
+# Cache hits are parsed locally and never touch the wrapped fetcher. In replay
+# mode there is no wrapped fetcher at all: every page must come from the cache
+# (the TTL is ignored) and a miss is reported like a page that never loaded.
+class CachingFetcher:
+    def __init__(self, inner, cache, pacer, replay=False):
+        self.inner = inner
+        self.cache = cache
+        self.pacer = pacer
+        self.replay = replay
+
+    def _load(self, url, locator, page_kind):
+        html = self.cache.get(url, allow_stale=self.replay)
+        if html is not None:
+            page = HtmlPage(html, url)
+            if page.has_element(*locator):
+                return page
+        if self.replay:
+            raise TimeoutException(f"Page not in cache: {url}")
+        if page_kind == "search":
+            page = self.inner.get_search_page(url)
+        else:
+            page = self.inner.get_product_page(url)
+        self.cache.put(url, page.page_source)
+        return page
+
+    def get_search_page(self, url):
+        return self._load(url, SEARCH_PAGE_LOCATOR, "search")
+
+    def get_product_page(self, url):
+        return self._load(url, PRODUCT_PAGE_LOCATOR, "product")
+
+    def close(self):
+        if self.inner:
+            self.inner.close()
@@ -0,0 +1,311 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import TimeoutException
+
+from amazon_scraper import (
+    DEFAULT_BASE_URL, MIN_RELEVANCE_SCORE, STATUS_DONE, STATUS_ERROR, STATUS_NO_MATCH, STATUS_TIMEOUT,
+    asin_from_link, build_search_url, empty_laptop_record, extract_specs, rank_search_results,
+    read_product_page,
+)
+from run_metrics import metric_span
+
+
+# --- Staged asyncio scraping pipeline ---
+# search fetch -> candidate ranking -> product fetch -> spec extraction -> sink
+#
+# The stages are connected by bounded queues, so a slow stage makes the ones in
+# front of it wait instead of piling pages up in memory. Fetches run on a pool
+# of fetch sessions in worker threads; ranking and extraction run on their own
+# threads, so parsing one page never holds up the next request. Models that end
+# early (timeout, no match, error) go straight to the sink, which hands rows to
+# on_result in input order.
+
+class StageStats:
+    def __init__(self, name, queue):
+        self.name = name
+        self.queue = queue
+        self.processed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+
+    def record(self, seconds):
+        self.processed += 1
+        self.busy_seconds += seconds
+
+    def sample_depth(self):
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def report(self, elapsed):
+        per_minute = self.processed / elapsed * 60 if elapsed > 0 else 0.0
+        avg = self.busy_seconds / self.processed if self.processed else 0.0
+        return (f"  {self.name:<16} queue {self.queue.qsize():>3} (max {self.max_depth:>3})  "
+                f"done {self.processed:>6}  {per_minute:7.1f}/min  avg {avg:6.2f}s")
+
+
+class PipelineJob:
+    def __init__(self, index, model_name):
+        self.index = index
+        self.model_name = model_name
+        self.laptop_data = empty_laptop_record(model_name)
+        self.status = STATUS_DONE
+        self.page = None
+        self.best_match_link = None
+        self.best_match_title = ""
+        self.resolved = False
+        self.product_info = None
+        self.memo_asin = None
+
+
+class ScrapePipeline:
+    def __init__(self, fetchers, on_result, base_url=DEFAULT_BASE_URL, queue_size=8, report_interval=60,
+                 asin_index=None, product_memo=None, metrics=None):
+        self.on_result = on_result
+        self.metrics = metrics
+        self.base_url = base_url
+        self.asin_index = asin_index
+        self.product_memo = product_memo
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.fetch_workers = len(fetchers)
+        self.fetchers = fetchers
+
+        self.search_queue = asyncio.Queue(queue_size)
+        self.rank_queue = asyncio.Queue(queue_size)
+        self.product_queue = asyncio.Queue(queue_size)
+        self.extract_queue = asyncio.Queue(queue_size)
+        self.sink_queue = asyncio.Queue(queue_size)
+        self.stats = [
+            StageStats("search fetch", self.search_queue),
+            StageStats("ranking", self.rank_queue),
+            StageStats("product fetch", self.product_queue),
+            StageStats("spec extraction", self.extract_queue),
+            StageStats("sink", self.sink_queue),
+        ]
+        # Caps how many models are between the feeder and the sink, which also
+        # bounds the sink's reorder buffer.
+        self.in_flight = asyncio.Semaphore(queue_size * len(self.stats))
+        self.fetch_executor = ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="fetch")
+        self.parse_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="parse")
+
+    async def run(self, laptop_models):
+        self.started = time.monotonic()
+        self.fetcher_pool = asyncio.Queue()
+        for fetcher in self.fetchers:
+            self.fetcher_pool.put_nowait(fetcher)
+
+        reporter = asyncio.create_task(self._report_periodically())
+        try:
+            await asyncio.gather(
+                self._feed(laptop_models),
+                self._stage(self.stats[0], self.fetch_workers, self._search_fetch, self.rank_queue, 1),
+                self._stage(self.stats[1], 1, self._rank, self.product_queue, self.fetch_workers),
+                self._stage(self.stats[2], self.fetch_workers, self._product_fetch, self.extract_queue, 1),
+                self._stage(self.stats[3], 1, self._extract, self.sink_queue, 1),
+                self._sink(),
+            )
+        finally:
+            reporter.cancel()
+            self.fetch_executor.shutdown(wait=False)
+            self.parse_executor.shutdown(wait=False)
+        self.print_report("Pipeline finished")
+
+    # Models the ASIN index can resolve skip the search and ranking stages.
+    async def _feed(self, laptop_models):
+        for index, model_name in enumerate(laptop_models):
+            await self.in_flight.acquire()
+            job = PipelineJob(index, model_name)
+            resolved = self.asin_index.lookup(model_name) if self.asin_index else None
+            if resolved:
+                print(f"  Resolved '{model_name[:50]}' from ASIN index ({resolved['asin']}, {resolved['match']} match).")
+                job.best_match_link = resolved['product_link']
+                job.best_match_title = resolved['title']
+                job.resolved = True
+                await self.product_queue.put(job)
+            else:
+                await self.search_queue.put(job)
+        for _ in range(self.fetch_workers):
+            await self.search_queue.put(None)
+
+    # Runs `workers` copies of handler over in_queue. Once all of them have seen
+    # their end-of-input marker, the stage passes markers on to the next one.
+    async def _stage(self, stats, workers, handler, next_queue, next_workers):
+        async def worker():
+            while True:
+                job = await stats.queue.get()
+                if job is None:
+                    return
+                stats.sample_depth()
+                started = time.monotonic()
+                try:
+                    forward = await handler(job)
+                except Exception as e:
+                    print(f"  [{stats.name}] Error while processing '{job.model_name}': {e}")
+                    job.status = STATUS_ERROR
+                    self._release_memo(job)
+                    forward = False
+                stats.record(time.monotonic() - started)
+                await (next_queue if forward else self.sink_queue).put(job)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        for _ in range(next_workers):
+            await next_queue.put(None)
+
+    # Loads url on a free fetch session and returns the parsed page. The
+    # session then takes the pause scrape_model would have taken at this point
+    # (pause_on_timeout / pause_after), before it is handed to the next fetch.
+    async def _fetch(self, method_name, url, stage, model_name, pause_on_timeout=None, pause_after=None):
+        fetcher = await self.fetcher_pool.get()
+
+        def fetch():
+            try:
+                with metric_span(self.metrics, stage, model_name):
+                    return getattr(fetcher, method_name)(url)
+            except TimeoutException:
+                if pause_on_timeout:
+                    fetcher.pacer.pause(*pause_on_timeout)
+                raise
+            finally:
+                if pause_after:
+                    fetcher.pacer.pause(*pause_after)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.fetch_executor, fetch)
+        finally:
+            self.fetcher_pool.put_nowait(fetcher)
+
+    # Takes a pause on a free fetch session, where scrape_model would pause
+    # without loading anything (after a search that found no match).
+    async def _pause(self, low, high):
+        fetcher = await self.fetcher_pool.get()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.fetch_executor, fetcher.pacer.pause, low, high)
+        finally:
+            self.fetcher_pool.put_nowait(fetcher)
+
+    # Runs func on the parse threads. With a stage, the call is timed there, so
+    # the span does not include the wait for a free thread.
+    async def _parse(self, func, *args, stage=None, model_name=None):
+        def parse():
+            with metric_span(self.metrics if stage else None, stage, model_name):
+                return func(*args)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parse)
+
+    async def _search_fetch(self, job):
+        try:
+            job.page = await self._fetch("get_search_page", build_search_url(job.model_name, self.base_url),
+                                         "search_load", job.model_name, pause_on_timeout=(10, 15))
+        except TimeoutException:
+            print(f"  Timed out waiting for Amazon search results for '{job.model_name}'. Moving to next.")
+            job.status = STATUS_TIMEOUT
+            return False
+        return True
+
+    async def _rank(self, job):
+        best_match_link, best_match_title, max_score = await self._parse(
+            rank_search_results, job.page, job.model_name, stage="ranking", model_name=job.model_name)
+        job.page = None
+        if best_match_link and max_score >= MIN_RELEVANCE_SCORE:
+            print(f"  Best relevant product for '{job.model_name[:50]}' (Score: {max_score}): {best_match_link}")
+            job.best_match_link = best_match_link
+            job.best_match_title = best_match_title
+            if self.asin_index:
+                self.asin_index.record(job.model_name, best_match_link, best_match_title, max_score)
+            return True
+        print(f"  No sufficiently relevant product found for '{job.model_name}' (Best Score: {max_score}).")
+        job.status = STATUS_NO_MATCH
+        await self._pause(10, 15)
+        return False
+
+    # With a product memo, only the first row asking for an ASIN fetches the
+    # page; rows asking for it meanwhile wait for that fetch and later rows reuse
+    # the result. Rows carrying product_info skip the fetch.
+    async def _product_fetch(self, job):
+        asin = asin_from_link(job.best_match_link)
+        if self.product_memo and asin:
+            state, value = self.product_memo.begin(asin)
+            while state == 'wait':
+                # A leader that failed is not remembered: go back through the
+                # guard so only one of the waiting jobs retries the page.
+                await asyncio.get_running_loop().run_in_executor(None, value.wait)
+                product_info = self.product_memo.result(asin)
+                if product_info is not None:
+                    state, value = 'hit', product_info
+                else:
+                    state, value = self.product_memo.begin(asin)
+            if state == 'hit':
+                job.product_info = value
+                return True
+            if state == 'lead':
+                job.memo_asin = asin
+
+        try:
+            job.page = await self._fetch("get_product_page", job.best_match_link, "product_load", job.model_name,
+                                         pause_after=(7, 15))
+        except TimeoutException:
+            print(f"  Timed out loading product detail page for '{job.model_name}'. Moving to next.")
+            job.status = STATUS_TIMEOUT
+            self._release_memo(job)
+            if job.resolved:
+                self.asin_index.forget(job.model_name)
+            return False
+        return True
+
+    async def _extract(self, job):
+        if job.product_info is None:
+            job.product_info = await self._parse(read_product_page, job.page, self.metrics, job.model_name)
+            job.page = None
+            self._release_memo(job, job.product_info)
+        with metric_span(self.metrics, "spec_rules", job.model_name):
+            job.laptop_data.update(extract_specs(job.product_info, job.best_match_title))
+        job.product_info = None
+        return True
+
+    def _release_memo(self, job, product_info=None):
+        if job.memo_asin:
+            self.product_memo.finish(job.memo_asin, product_info)
+            job.memo_asin = None
+
+    async def _sink(self):
+        stats = self.stats[4]
+        pending = {}
+        next_index = 0
+        while True:
+            job = await self.sink_queue.get()
+            if job is None:
+                break
+            stats.sample_depth()
+            pending[job.index] = job
+            while next_index in pending:
+                ready = pending.pop(next_index)
+                started = time.monotonic()
+                self.on_result(ready.laptop_data, ready.status)
+                stats.record(time.monotonic() - started)
+                self.in_flight.release()
+                next_index += 1
+
+    async def _report_periodically(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.print_report("Pipeline progress")
+
+    def print_report(self, title):
+        elapsed = time.monotonic() - self.started
+        print(f"\n{title} after {elapsed:.0f}s:")
+        for stats in self.stats:
+            print(stats.report(elapsed))
+
+
+def run_pipeline(laptop_models, fetchers, on_result, base_url=DEFAULT_BASE_URL, queue_size=8, report_interval=60,
+                 asin_index=None, product_memo=None, metrics=None):
+    async def main():
+        pipeline = ScrapePipeline(fetchers, on_result, base_url=base_url, queue_size=queue_size,
+                                  report_interval=report_interval, asin_index=asin_index,
+                                  product_memo=product_memo, metrics=metrics)
+        await pipeline.run(laptop_models)
+
+    asyncio.run(main())
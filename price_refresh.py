@@ -0,0 +1,175 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import TimeoutException
+
+from amazon_scraper import read_price, read_rating
+from output_sink import create_output_sink, output_format_for, read_output_rows
+
+
+# --- Price / rating refresh state ---
+# One row per model with the product page it resolved to, the last price and
+# rating seen there, the HTTP validators (ETag / Last-Modified) of that page and
+# when it was last checked. Shared by the refresh threads, hence the lock.
+class RefreshStore:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS refresh ("
+            " model TEXT PRIMARY KEY,"
+            " product_link TEXT NOT NULL,"
+            " price TEXT,"
+            " rating TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " checked_at REAL,"
+            " changed_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS refresh_checked_at ON refresh (checked_at)")
+        self.conn.commit()
+
+    # Adds the models of the previous results. A model whose product link
+    # changed (e.g. a new search after the old listing vanished) starts over.
+    def register(self, rows):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO refresh (model, product_link, price, rating) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(model) DO UPDATE SET product_link = excluded.product_link, price = excluded.price, "
+                "rating = excluded.rating, etag = NULL, last_modified = NULL, checked_at = NULL "
+                "WHERE refresh.product_link != excluded.product_link",
+                rows,
+            )
+
+    # Models not checked for max_age_seconds, never-checked and stalest first.
+    def stale(self, max_age_seconds, limit=0):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT model, product_link, price, rating, etag, last_modified FROM refresh "
+                "WHERE checked_at IS NULL OR checked_at < ? ORDER BY checked_at IS NOT NULL, checked_at "
+                "LIMIT ?", (time.time() - max_age_seconds, limit if limit > 0 else -1)
+            ).fetchall()
+
+    def update(self, model_name, price, rating, etag, last_modified, changed):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE refresh SET price = ?, rating = ?, etag = ?, last_modified = ?, checked_at = ?, "
+                "changed_at = CASE WHEN ? THEN ? ELSE changed_at END WHERE model = ?",
+                (price, rating, etag, last_modified, now, changed, now, model_name),
+            )
+
+    # Price and rating of a model checked at or after `since`, else None.
+    def checked_since(self, model_name, since):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT price, rating FROM refresh WHERE model = ? AND checked_at >= ?", (model_name, since)
+            ).fetchone()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# --- Refresh run ---
+# Starts from the previous results (previous_path) instead of the model list:
+# 1. every row whose exact model string has a product link in the ASIN index
+#    is registered in the refresh store; other rows are carried forward as they
+#    are (a broader key may point at another configuration's listing),
+# 2. models not checked for max_age_seconds are revisited, stalest first (at
+#    most `limit`). Only the product page is loaded, conditionally where the
+#    fetcher supports it (a 304 means price and rating are unchanged), and only
+#    price and rating are read from it,
+# 3. the previous results are written to output_path with the new price and
+#    rating of every model checked in step 2. All other fields are untouched.
+# CSV and JSONL output is written next to output_path and moved over it at the
+# end, so output_path may be previous_path itself. Parquet output goes to a new
+# directory.
+def run_refresh(previous_path, output_path, fetchers, asin_index, store, output_format=None,
+                max_age_seconds=20 * 3600, limit=0, flush_rows=None, flush_seconds=None):
+    output_format = output_format or output_format_for(output_path)
+    if output_format == "parquet" and os.path.isdir(output_path) and os.listdir(output_path):
+        raise ValueError("A Parquet refresh needs an empty or new --output directory.")
+    started = time.time()
+
+    # --- 1. Register the known product links ---
+    batch = []
+    unresolved = 0
+    for row in read_output_rows(previous_path, output_format_for(previous_path)):
+        product_link = asin_index.exact_link(row['Model'])
+        if not product_link:
+            unresolved += 1
+            continue
+        batch.append((row['Model'], product_link, row.get('Price'), row.get('Rating')))
+        if len(batch) >= 1000:
+            store.register(batch)
+            batch = []
+    if batch:
+        store.register(batch)
+
+    # --- 2. Revisit the stale product pages ---
+    stale = store.stale(max_age_seconds, limit)
+    print(f"Refreshing {len(stale)} product pages ({unresolved} rows have no known product page).")
+    counts = {'changed': 0, 'unchanged': 0, 'not-modified': 0, 'failed': 0}
+    counts_lock = threading.Lock()
+    fetcher_pool = queue.Queue()
+    for fetcher in fetchers:
+        fetcher_pool.put(fetcher)
+
+    def refresh_one(entry):
+        model_name, product_link, old_price, old_rating, etag, last_modified = entry
+        fetcher = fetcher_pool.get()
+        try:
+            if hasattr(fetcher, 'get_product_page_if_changed'):
+                page, etag, last_modified = fetcher.get_product_page_if_changed(product_link, etag, last_modified)
+            else:
+                page = fetcher.get_product_page(product_link)
+            if page is None:
+                outcome = 'not-modified'
+                price, rating = old_price, old_rating
+            else:
+                price, rating = read_price(page), read_rating(page)
+                outcome = 'changed' if (price, rating) != (old_price, old_rating) else 'unchanged'
+            store.update(model_name, price, rating, etag, last_modified, changed=outcome == 'changed')
+            if outcome == 'changed':
+                print(f"  '{model_name[:50]}': price {old_price} -> {price}, rating {old_rating} -> {rating}.")
+        except TimeoutException as e:
+            outcome = 'failed'
+            print(f"  Could not refresh '{model_name[:50]}' ({e}). Keeping the previous values.")
+        except Exception as e:
+            outcome = 'failed'
+            print(f"  An unexpected error occurred while refreshing '{model_name[:50]}': {e}")
+        finally:
+            fetcher.pacer.pause(7, 15)
+            fetcher_pool.put(fetcher)
+        with counts_lock:
+            counts[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=len(fetchers), thread_name_prefix="refresh") as executor:
+        for _ in executor.map(refresh_one, stale):
+            pass
+
+    # --- 3. Write the refreshed results ---
+    write_path = output_path if output_format == "parquet" else f"{output_path}.refresh-tmp"
+    if write_path != output_path and os.path.exists(write_path):
+        os.remove(write_path)
+    sink = create_output_sink(write_path, output_format, flush_rows=flush_rows, flush_seconds=flush_seconds)
+    try:
+        for row in read_output_rows(previous_path, output_format_for(previous_path)):
+            refreshed = store.checked_since(row['Model'], started)
+            if refreshed:
+                row = dict(row, Price=refreshed[0], Rating=refreshed[1])
+            sink.write(row)
+    finally:
+        sink.close()
+    if write_path != output_path:
+        os.replace(write_path, output_path)
+
+    print("Refresh: " + ", ".join(f"{outcome}={count}" for outcome, count in counts.items())
+          + f"; {sink.rows_written} rows written to '{output_path}'.")
+    return counts
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+
+# --- In-run product page memo ---
+# Several model rows often resolve to the same listing. The page data read for
+# an ASIN (see amazon_scraper.read_product_page) is kept and handed to every row
+# that asks for it. Only the max_entries most recently used pages are kept, so
+# memory stays bounded on long runs; rows of one laptop are usually close
+# together in the input. A single-flight guard makes sure
+# concurrent workers asking for the same ASIN wait for one fetch instead of
+# each loading the page. Failed loads are not remembered; the rows that waited
+# on one go back through the guard, so one of them leads the next attempt.
+class ProductPageMemo:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.results = OrderedDict()
+        self.in_flight = {}
+        self.fetches = 0
+        self.shared = 0
+
+    # Returns ('hit', product_info), ('wait', event) or ('lead', None). The
+    # leader must call finish() whether or not its load succeeded.
+    def begin(self, asin):
+        with self.lock:
+            if asin in self.results:
+                self.results.move_to_end(asin)
+                self.shared += 1
+                return 'hit', self.results[asin]
+            event = self.in_flight.get(asin)
+            if event is not None:
+                return 'wait', event
+            self.in_flight[asin] = threading.Event()
+            return 'lead', None
+
+    def finish(self, asin, product_info):
+        with self.lock:
+            if product_info is not None:
+                self.results[asin] = product_info
+                if len(self.results) > self.max_entries:
+                    self.results.popitem(last=False)
+                self.fetches += 1
+            event = self.in_flight.pop(asin, None)
+        if event is not None:
+            event.set()
+
+    # Result for an ASIN a follower waited on, or None if the leader failed.
+    def result(self, asin):
+        with self.lock:
+            product_info = self.results.get(asin)
+            if product_info is not None:
+                self.shared += 1
+            return product_info
+
+    def get(self, asin, load):
+        state, value = self.begin(asin)
+        while state == 'wait':
+            value.wait()
+            product_info = self.result(asin)
+            if product_info is not None:
+                print(f"  Product page {asin} scraped by another worker. Reusing it.")
+                return product_info
+            state, value = self.begin(asin)
+        if state == 'hit':
+            print(f"  Product page {asin} already scraped in this run. Reusing it.")
+            return value
+        product_info = None
+        try:
+            product_info = load()
+        finally:
+            self.finish(asin, product_info)
+        return product_info
@@ -0,0 +1,123 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from run_metrics import metric_span
+
+
+# --- Adaptive (AIMD) token bucket ---
+# Tokens refill at `rate` pages per second, up to `burst`. Every healthy
+# response nudges the rate up by a fixed step (additive increase); a throttling
+# signal cuts it by a factor (multiplicative decrease) and blocks the bucket for
+# a backoff period that doubles while the throttling continues. The rate always
+# stays within [min_per_minute, max_per_minute], the initial one included.
+class AdaptiveRateLimiter:
+    def __init__(self, name, initial_per_minute, min_per_minute, max_per_minute, burst=1,
+                 increase_per_minute=1.0, decrease_factor=0.5, backoff_seconds=30.0, max_backoff_seconds=600.0):
+        self.name = name
+        self.min_rate = min_per_minute / 60.0
+        self.max_rate = max_per_minute / 60.0
+        self.rate = max(self.min_rate, min(initial_per_minute / 60.0, self.max_rate))
+        self.burst = burst
+        self.increase = increase_per_minute / 60.0
+        self.decrease_factor = decrease_factor
+        self.base_backoff = backoff_seconds
+        self.max_backoff = max_backoff_seconds
+        self.backoff = backoff_seconds
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttle_events = 0
+        self.waited_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Takes one token, sleeping first if the bucket is empty or backing off.
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+            self.waited_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.backoff = self.base_backoff
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.blocked_until = max(self.blocked_until, now + self.backoff)
+            self.throttle_events += 1
+            print(f"  Throttling detected ({self.name}). Backing off {self.backoff:.0f}s, "
+                  f"then {self.rate * 60:.1f} pages/min.")
+            self.backoff = min(self.max_backoff, self.backoff * 2)
+
+    def pages_per_minute(self):
+        return self.rate * 60
+
+
+# One limiter per host, shared by every session of the run.
+class HostRateLimits:
+    def __init__(self, max_per_minute, min_per_minute=1.0, burst=2):
+        self.max_per_minute = max_per_minute
+        self.min_per_minute = min_per_minute
+        self.burst = burst
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(
+                    f"host {host}", initial_per_minute=self.max_per_minute / 2,
+                    min_per_minute=self.min_per_minute, max_per_minute=self.max_per_minute, burst=self.burst,
+                )
+                self.limiters[host] = limiter
+            return limiter
+
+
+# --- Pacer driven by the adaptive limiters ---
+# Drop-in replacement for fetchers.PagePacer. Instead of fixed random pauses,
+# every page load waits for a token from its session's limiter and from the
+# host's limiter, and the fetcher reports back whether the response was healthy.
+class AdaptivePacer:
+    def __init__(self, host_limits, initial_per_minute=6.0, min_per_minute=1.0, max_per_minute=30.0, metrics=None):
+        self.host_limits = host_limits
+        self.metrics = metrics
+        self.session = AdaptiveRateLimiter(
+            "session", initial_per_minute=initial_per_minute,
+            min_per_minute=min_per_minute, max_per_minute=max_per_minute,
+        )
+
+    def before_load(self, url=None):
+        with metric_span(self.metrics, "sleep"):
+            self.session.acquire()
+            if url is not None:
+                self.host_limits.for_url(url).acquire()
+
+    def after_load(self, url, throttled):
+        limiters = [self.session]
+        if url is not None:
+            limiters.append(self.host_limits.for_url(url))
+        for limiter in limiters:
+            if throttled:
+                limiter.on_throttle()
+            else:
+                limiter.on_success()
+
+    # The fixed pauses between models are replaced by the token buckets above.
+    def pause(self, low, high):
+        pass
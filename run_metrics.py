@@ -0,0 +1,132 @@
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from array import array
+
+# Stages timed by the scraper, in the order they are reported.
+#   search_load / product_load   fetching a page, as seen by the scraping flow
+#   browser_start                starting (or recycling) a Chrome session
+#   http_request / browser_load  the network or browser part of a fetch
+#   browser_snapshot             pulling the page out of Chrome (WebDriver IPC)
+#   html_parse                   parsing page HTML with lxml
+#   ranking                      reading and scoring the search result cards
+#   price / rating / specs       reading those parts of the product page
+#   spec_rules                   turning the specs into the output fields
+#   output_write                 handing the row to the output sink
+#   sleep                        pauses and rate limiting between page loads
+STAGES = (
+    "search_load", "product_load", "browser_start", "http_request", "browser_load", "browser_snapshot", "html_parse",
+    "ranking", "price", "rating", "specs", "spec_rules", "output_write", "sleep",
+)
+
+
+# --- Per-stage timing spans ---
+# Every span is a (stage, model, seconds) record. Durations are kept per stage
+# for the end-of-run percentiles; with spans_path set, each span is also
+# appended to that file as one JSON line. prometheus_path gets the per-stage
+# summaries and the counters in the Prometheus text format when the run ends
+# (e.g. for node_exporter's textfile collector). Shared by all threads.
+class RunMetrics:
+    def __init__(self, spans_path=None, prometheus_path=None):
+        self.prometheus_path = prometheus_path
+        self.durations = {}
+        self.counts = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.spans_file = open(spans_path, "a", encoding="utf-8") if spans_path else None
+
+    @contextlib.contextmanager
+    def span(self, stage, model_name=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, model_name)
+
+    def record(self, stage, seconds, model_name=None):
+        with self.lock:
+            durations = self.durations.get(stage)
+            if durations is None:
+                durations = self.durations[stage] = array('d')
+            durations.append(seconds)
+            if self.spans_file:
+                self.spans_file.write(json.dumps(
+                    {'ts': round(time.time(), 3), 'model': model_name, 'stage': stage, 'seconds': round(seconds, 6)},
+                    ensure_ascii=False,
+                ) + "\n")
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def _stages(self):
+        known = [stage for stage in STAGES if stage in self.durations]
+        return known + sorted(stage for stage in self.durations if stage not in STAGES)
+
+    def summary_lines(self):
+        with self.lock:
+            lines = [f"  {'stage':<17}{'count':>8}{'total s':>11}{'p50 s':>10}{'p95 s':>10}{'max s':>10}"]
+            for stage in self._stages():
+                values = sorted(self.durations[stage])
+                lines.append(f"  {stage:<17}{len(values):>8}{sum(values):>11.1f}{percentile(values, 0.5):>10.3f}"
+                             f"{percentile(values, 0.95):>10.3f}{values[-1]:>10.3f}")
+            sleep_total = sum(self.durations.get("sleep", ()))
+            lines.append(f"  Time spent sleeping: {sleep_total:.0f}s")
+            lines.append("  Counts: " + (", ".join(f"{name}={count}" for name, count in sorted(self.counts.items()))
+                                         or "none"))
+        return lines
+
+    def write_prometheus(self):
+        lines = [
+            "# HELP scraper_stage_seconds Time spent per scraping stage.",
+            "# TYPE scraper_stage_seconds summary",
+        ]
+        with self.lock:
+            for stage in self._stages():
+                values = sorted(self.durations[stage])
+                for quantile in (0.5, 0.95):
+                    lines.append(f'scraper_stage_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                                 f'{percentile(values, quantile):.6f}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {sum(values):.6f}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {len(values)}')
+            lines += [
+                "# HELP scraper_events_total Models by final status, and other run events.",
+                "# TYPE scraper_events_total counter",
+            ]
+            for name, count in sorted(self.counts.items()):
+                lines.append(f'scraper_events_total{{event="{name}"}} {count}')
+        lines += [
+            "# HELP scraper_run_started_seconds Unix time the run started.",
+            "# TYPE scraper_run_started_seconds gauge",
+            f"scraper_run_started_seconds {self.started:.0f}",
+        ]
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prometheus_path)
+
+    def close(self):
+        if self.prometheus_path:
+            self.write_prometheus()
+        with self.lock:
+            if self.spans_file:
+                self.spans_file.close()
+                self.spans_file = None
+
+
+# Nearest-rank percentile of already sorted values.
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+# Times the with-block as `stage` on metrics, or does nothing when metrics is None.
+def metric_span(metrics, stage, model_name=None):
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.span(stage, model_name)
@@ -1,516 +1,392 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import pandas as pd
-import time
-import re
-import math
-import random 
-import os 
-
-# --- Configuration ---
-chrome_driver_path = "chromedriver.exe" 
-laptop_models_csv = "laptop_models.csv" 
-output_csv_name = "scraped_laptop_data_amazon.csv" 
-
-column_order = ['Model', 'Brand', 'Price', 'Rating', 'Graphics Card', 'Memory', 'Processor', 'Type: Work or Gaming']
-
-def extract_simple_brand(text):
-    text_lower = text.lower()
-    brands = [
-        'hp', 'lenovo', 'dell', 'asus', 'acer', 'msi', 'apple', 'samsung', 
-        'microsoft', 'lg', 'gigabyte', 'razer', 'alienware', 'xiaomi', 'tecno', 
-        'zebronics', 'microsoft surface', 'huawei', 'vaio', 'toshiba', 'fujitsu'
-    ]
-    for brand in brands:
-        if brand in text_lower:
-            if brand == 'microsoft surface':
-                return 'Microsoft Surface'
-            if re.search(r'\b' + re.escape(brand) + r'\b', text_lower):
-                return brand.capitalize() 
-    return None 
-
-
-def calculate_relevance_score(search_result_title, original_model_name):
-    original_words = set(re.findall(r'\b\w+\b', original_model_name.lower()))
-    result_words = set(re.findall(r'\b\w+\b', search_result_title.lower()))
-
-    stopwords = {'a', 'an', 'the', 'and', 'or', 'for', 'with', 'from', 'in', 'on', 'of'} 
-    original_words = {word for word in original_words if word not in stopwords and len(word) > 1}
-    result_words = {word for word in result_words if word not in stopwords and len(word) > 1} 
-
-    common_words = original_words.intersection(result_words)
-    score = len(common_words)
-
-    original_brand = extract_simple_brand(original_model_name)
-    result_brand = extract_simple_brand(search_result_title)
-
-    if original_brand and result_brand:
-        if original_brand == result_brand:
-            score += 15 # Even higher bonus if brands exactly match
-        else:
-            score -= 30 # Even more severe penalty if brands mismatch
-    elif original_brand and not result_brand:
-        score -= 5 
-    model_parts_to_match = []
-    # Try to extract actual model number/series
-    model_match = re.search(r'\b(?:victus|ideapad|thinkpad|zenbook|vivobook|legion|omen|spectre|inspiron|pavilion|macbook|galaxy book)\s*([\w\d\-\.]+)', original_model_name.lower())
-    if model_match:
-        model_parts_to_match = model_match.group(0).split() + model_match.group(1).split('-')
-        model_parts_to_match = [p for p in model_parts_to_match if len(p) > 2] # Only meaningful parts
-    
-    for part in model_parts_to_match:
-        if part in result_words:
-            score += 3 # Bonus for matching specific model parts
-
-    if original_model_name.lower() in search_result_title.lower(): # Check full phrase match
-        score += 5 # Added bonus for full name match.
-        
-    if "refurbished" in search_result_title.lower() or "renewed" in search_result_title.lower():
-        score -= 50 # Extremely severe penalty to filter out refurbished/renewed
-
-    return score
-
-
-# --- 1. Load your CSV file ---
-print(f"Loading laptop models from {laptop_models_csv}...")
-try:
-    df_models = pd.read_csv(laptop_models_csv)
-    if 'Model' in df_models.columns:
-        laptop_models = df_models['Model'].tolist()
-        
-        
-        print(f"Successfully loaded {len(df_models.index)} laptop models for processing.")
-        print("First 5 models:", laptop_models[:5])
-    else:
-        print(f"Error: Column 'Model' not found in {laptop_models_csv}.")
-        print("Please ensure your CSV has a column exactly named 'Model'.")
-        exit()
-except FileNotFoundError:
-    print(f"Error: '{laptop_models_csv}' not found.")
-    print("Please make sure the CSV file is in the same folder as this script.")
-    exit()
-except Exception as e:
-    print(f"An error occurred while reading the CSV: {e}")
-    exit()
-
-# --- 2. Initialize the WebDriver ---
-chrome_options = Options()
-chrome_options.add_argument("--headless") 
-chrome_options.add_argument("--disable-gpu") 
-chrome_options.add_argument("--no-sandbox") 
-chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36")
-
-driver = None
-scraped_data_in_memory = [] 
-
-csv_header_written = False
-if os.path.exists(output_csv_name):
-    csv_header_written = True 
-    print(f"Warning: '{output_csv_name}' already exists. Appending to it.")
-else:
-    print(f"Creating new file: '{output_csv_name}'")
-
-
-try:
-    print("\nAttempting to open Chrome browser...")
-    service = Service(executable_path=chrome_driver_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    print("Chrome browser opened successfully!")
-
-    # --- 3. Loop through each laptop model for scraping ---
-    for i, model_name in enumerate(laptop_models):
-        print(f"\n--- Scraping data for Model {i+1}/{len(laptop_models)}: {model_name} ---")
-
-        # Define default values for each field for the current model
-        brand = 'N/A'
-        price = 'N/A'
-        rating = 'N/A'
-        graphics_card = 'N/A'
-        memory = 'N/A'
-        processor = 'N/A'
-        
-        if "gaming" in model_name.lower():
-            type_work_gaming = "Gaming"
-        else:
-            type_work_gaming = "Work"
-
-        try:
-            search_query = model_name.replace(' ', '+')
-            amazon_search_url = f"https://www.amazon.in/s?k={search_query}"
-            driver.get(amazon_search_url)
-
-            # --- Wait for search results and implement relevance check ---
-            best_match_link = None
-            best_match_title = "" 
-            max_score = -100 # Very low initial score to handle severe penalties
-
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-component-type="s-search-result"]'))
-                )
-                time.sleep(random.uniform(7, 12)) 
-                print("  Amazon search results page loaded. Checking relevance...")
-
-                product_cards = driver.find_elements(By.CSS_SELECTOR, 'div[data-component-type="s-search-result"]')
-                
-                if not product_cards:
-                    print(f"  No product cards found on search results page for '{model_name}'.")
-                
-                for j, card in enumerate(product_cards[:15]): # Check up to first 15 results
-                    result_title = ""
-                    result_link = None
-                    is_sponsored = False
-
-                    try:
-                        title_h2_element = card.find_element(By.CSS_SELECTOR, 'h2.a-text-normal')
-                        result_title = title_h2_element.text.strip()
-                        
-                        if title_h2_element.get_attribute('aria-label') and "sponsored ad" in title_h2_element.get_attribute('aria-label').lower():
-                            is_sponsored = True
-                            
-                        all_links_in_card = card.find_elements(By.TAG_NAME, 'a')
-                        for link_el in all_links_in_card:
-                            href = link_el.get_attribute('href')
-                            if href and '/dp/' in href and not ('/s?' in href or 'node=' in href or '/gp/' in href):
-                                result_link = href
-                                break
-
-                        if not result_link:
-                            # print(f"      Result {j+1}: No valid product detail link found. Skipping.") 
-                            continue
-
-                        # Debugging print statements (commented out for clean output during full run)
-                        # print(f"      Debugging: Original Model: '{model_name[:50]}...'")
-                        # print(f"      Debugging: Result Title: '{result_title[:70]}...'")
-
-                        current_score = calculate_relevance_score(result_title, model_name)
-                        
-                        if is_sponsored:
-                            current_score -= 10 # Penalize sponsored ads
-
-                        # print(f"    Result {j+1}: '{result_title[:70]}...' (Score: {current_score}) {'(Sponsored)' if is_sponsored else ''}") 
-
-                        if current_score > max_score:
-                            max_score = current_score
-                            best_match_link = result_link
-                            best_match_title = result_title 
-
-                    except NoSuchElementException:
-                        # print(f"      Result {j+1}: Card structure not as expected. Skipping.") 
-                        continue 
-                    except Exception as e:
-                        print(f"      Error processing search result card {j+1} completely: {e}")
-
-                # Decide if a good enough match was found (UPDATED: Stricter threshold)
-                if best_match_link and max_score >= 8: # Higher score threshold for navigating to product page
-                    product_link = best_match_link
-                    print(f"  Best relevant product found (Score: {max_score}). Navigating to: {product_link}")
-                else:
-                    print(f"  No sufficiently relevant product found for '{model_name}' (Best Score: {max_score}). Moving to next.")
-                    laptop_data_to_save = { 
-                        'Model': model_name, 'Brand': brand, 'Price': price, 'Rating': rating, 'Graphics Card': graphics_card,
-                        'Memory': memory, 'Processor': processor, 'Type: Work or Gaming': type_work_gaming
-                    }
-                    scraped_data_in_memory.append(laptop_data_to_save)
-                    df_single_laptop = pd.DataFrame([laptop_data_to_save])
-                    df_single_laptop = df_single_laptop[column_order]
-                    if not csv_header_written:
-                        df_single_laptop.to_csv(output_csv_name, mode='a', header=True, index=False)
-                        csv_header_written = True
-                    else:
-                        df_single_laptop.to_csv(output_csv_name, mode='a', header=False, index=False)
-                    print(f"  Data for '{model_name[:50]}...' saved to CSV live (as N/A).")
-                    time.sleep(random.uniform(10, 15)) 
-                    continue
-
-            except TimeoutException:
-                print(f"  Timed out waiting for Amazon search results for '{model_name}'. No results or slow load. Moving to next.")
-                laptop_data_to_save = { 
-                    'Model': model_name, 'Brand': brand, 'Price': price, 'Rating': rating, 'Graphics Card': graphics_card,
-                    'Memory': memory, 'Processor': processor, 'Type: Work or Gaming': type_work_gaming
-                }
-                scraped_data_in_memory.append(laptop_data_to_save)
-                df_single_laptop = pd.DataFrame([laptop_data_to_save])
-                df_single_laptop = df_single_laptop[column_order]
-                if not csv_header_written:
-                    df_single_laptop.to_csv(output_csv_name, mode='a', header=True, index=False)
-                    csv_header_written = True
-                else:
-                    df_single_laptop.to_csv(output_csv_name, mode='a', header=False, index=False)
-                print(f"  Data for '{model_name[:50]}...' saved to CSV live (as N/A).")
-                time.sleep(random.uniform(10, 15)) 
-                continue
-
-            # --- Navigate to the product detail page ---
-            driver.get(product_link)
-
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.ID, 'productTitle'))
-            )
-            time.sleep(random.uniform(7, 12)) 
-            print("  Product detail page loaded.")
-
-            # --- Extract Price ---
-            price = 'N/A'
-            try:
-                price_element_offscreen = driver.find_element(By.CSS_SELECTOR, 'span.a-offscreen')
-                price = price_element_offscreen.get_attribute('textContent').strip()
-                print(f"    Price (offscreen): {price}")
-            except NoSuchElementException:
-                try:
-                    price_container_selector = '#corePrice_feature_div, #priceblock_ourprice, .reinventPricePriceToPayMargin'
-                    price_container = driver.find_element(By.CSS_SELECTOR, price_container_selector)
-
-                    price_whole = price_container.find_element(By.CSS_SELECTOR, 'span.a-price-whole').text.strip()
-                    
-                    try:
-                        price_fraction = price_container.find_element(By.CSS_SELECTOR, 'span.a-price-fraction').text.strip()
-                        price = f"₹{price_whole}.{price_fraction}"
-                    except NoSuchElementException:
-                        pass
-                    print(f"    Price (visible): {price}")
-                except NoSuchElementException:
-                    print("    Price not found on product page via common visible selectors.")
-            except Exception as e:
-                print(f"    Error extracting price: {e}")
-
-            rating = 'N/A'
-            try:
-                rating_text = ""
-                try: 
-                    rating_summary_element = driver.find_element(By.CSS_SELECTOR, '#averageCustomerReviews span.a-icon-alt')
-                    rating_text = rating_summary_element.get_attribute('innerHTML').strip()
-                except NoSuchElementException:
-                    try: 
-                        review_link_element = driver.find_element(By.CSS_SELECTOR, '#acrCustomerReviewLink')
-                        aria_label_rating = review_link_element.get_attribute('aria-label')
-                        if aria_label_rating and "out of" in aria_label_rating.lower():
-                            rating_text = aria_label_rating
-                    except NoSuchElementException:
-                        try: 
-                            general_rating_element = driver.find_element(By.CSS_SELECTOR, 'span.a-icon-alt')
-                            
-                            if "previous" not in general_rating_element.get_attribute('innerHTML').lower():
-                                rating_text = general_rating_element.get_attribute('innerHTML').strip()
-                        except NoSuchElementException:
-                            pass 
-
-                if rating_text:
-                    rating_match = re.search(r'(\d+\.?\d*)', rating_text) 
-                    if rating_match:
-                        rating = rating_match.group(1)
-                        # if "out of 5 stars" not in rating_text.lower(): # Debug print commented out
-                        # print(f"    Warning: Rating text ('{rating_text}') found, but missing 'out of 5 stars'. Using numerical part only.")
-                    else:
-                        # print(f"    Rating text found ('{rating_text}') but no numerical rating extracted. Setting to N/A.") # Debug print commented out
-                        rating = 'N/A' 
-                else:
-                    # print("    No rating text found. Setting to N/A.") # Debug print commented out
-                    rating = 'N/A'
-                
-                print(f"    Rating: {rating}")
-            except Exception as e:
-                print(f"    Error extracting rating: {e}")
-
-            # --- Extracting detailed specs (Graphics Card, Memory, Processor, Brand) ---
-            specs_dict = {}
-            full_description_for_inference = "" 
-
-            try:
-                specs_table = None
-                try: 
-                    specs_table = driver.find_element(By.CSS_SELECTOR, '#productDetails_techSpec_section_1 table.a-normal.a-spacing-micro')
-                except NoSuchElementException:
-                    try:
-                        specs_table = driver.find_element(By.CSS_SELECTOR, 'table.a-normal.a-spacing-micro')
-                    except NoSuchElementException:
-                        pass 
-
-                if specs_table:
-                    table_rows = specs_table.find_elements(By.TAG_NAME, 'tr')
-                    for row in table_rows:
-                        try:
-                            label_element = row.find_element(By.CSS_SELECTOR, 'td:nth-child(1) span.a-text-bold')
-                            value_element = row.find_element(By.CSS_SELECTOR, 'td:nth-child(2) span.a-size-base.po-break-word')
-                            label = label_element.text.strip().replace(':', '').strip()
-                            value = value_element.text.strip()
-                            specs_dict[label] = value
-                        except NoSuchElementException:
-                            pass
-                        except Exception as e:
-                            print(f"      Error parsing table row: {e}")
-                    # print(f"    Extracted structured specs (from table): {specs_dict}") 
-
-                if not specs_dict:
-                    try:
-                        detail_bullets_ul = driver.find_element(By.CSS_SELECTOR, '#detailBullets_feature_div ul.a-unordered-list')
-                        list_items = detail_bullets_ul.find_elements(By.TAG_NAME, 'li')
-
-                        for item in list_items:
-                            try:
-                                label_element = item.find_element(By.CSS_SELECTOR, 'span.a-text-bold')
-                                label = label_element.text.strip().replace(':', '').strip()
-
-                                item_text_full = item.text.strip()
-                                value = item_text_full.replace(label_element.text.strip(), '', 1).strip()
-
-                                specs_dict[label] = value
-                            except NoSuchElementException:
-                                pass
-                            except Exception as e:
-                                print(f"      Error parsing specific list item: {e}")
-                        # print(f"    Extracted structured specs (from UL list): {specs_dict}") 
-                    except NoSuchElementException:
-                        print("    Neither table nor UL specs container found. Specs will be N/A.")
-                    except Exception as e:
-                        print(f"    Error processing structured UL specs: {e}.")
-                
-                # --- After trying both methods, populate variables from specs_dict ---
-
-                # Extract Brand
-                brand_from_specs = specs_dict.get("Brand", None) 
-                if brand_from_specs:
-                    extracted_brand = extract_simple_brand(brand_from_specs)
-                    if extracted_brand:
-                        brand = extracted_brand
-                    else: 
-                        brand = brand_from_specs # Use raw if simple_brand couldn't extract
-                
-                if brand == 'N/A' or brand is None:
-                    try:
-                        brand_element_text = ""
-                        try:
-                            brand_element = driver.find_element(By.ID, 'bylineInfo')
-                            brand_element_text = brand_element.text.strip()
-                        except NoSuchElementException:
-                            product_title_element = driver.find_element(By.ID, 'productTitle')
-                            brand_element_text = product_title_element.text.strip()
-
-                        extracted_brand_fallback = extract_simple_brand(brand_element_text)
-                        if extracted_brand_fallback:
-                            brand = extracted_brand_fallback
-                        else:
-                            first_word_match = re.match(r'^[A-Za-z]+', brand_element_text)
-                            if first_word_match:
-                                brand = first_word_match.group(0)
-                    except Exception as e:
-                        print(f"    Error extracting brand (fallback): {e}")
-
-                # Processor (UPDATED for better specificity)
-                processor_text = specs_dict.get("Processor", "").lower()
-                if not processor_text:
-                    processor_text = specs_dict.get("CPU Model", "").lower()
-                if not processor_text and best_match_title: # Try best_match_title as source if specs_dict fails
-                    processor_text = best_match_title.lower()
-                
-                # Regex for more specific processor models
-                ryzen_match = re.search(r'(amd ryzen\s*[\d.x]+[hshx]?(?: \w+)?|amd ryzen\s*[3579]\s*\d*[hshx]?)', processor_text)
-                intel_match = re.search(r'(intel core\s*i[3579]\s*\d*[ghx]?)', processor_text)
-                apple_m_match = re.search(r'(apple m[1-3](?: pro| max| ultra)?)', processor_text)
-
-                if ryzen_match: processor = ryzen_match.group(1).upper()
-                elif intel_match: processor = intel_match.group(1).upper()
-                elif apple_m_match: processor = apple_m_match.group(1).upper()
-                elif processor_text: # Fallback to original text if no specific regex match but text exists
-                    processor = specs_dict.get("Processor", specs_dict.get("CPU Model", 'N/A'))
-                    if processor == 'N/A' and best_match_title: # If still N/A, try rough from title
-                         processor = "INTEL CORE" if "intel core" in best_match_title.lower() else ("AMD RYZEN" if "amd ryzen" in best_match_title.lower() else "N/A")
-
-
-                # Memory (RAM)
-                memory_text = specs_dict.get("RAM", "").lower()
-                if not memory_text:
-                    memory_text = specs_dict.get("Memory", "").lower()
-                if not memory_text: 
-                    memory_text = specs_dict.get("RAM Memory Installed Size", "").lower() 
-                ram_match = re.search(r'(\d+)\s*gb\s*ram', memory_text)
-                if ram_match: memory = ram_match.group(1) + "GB"
-                elif memory_text:
-                    memory = specs_dict.get("RAM", specs_dict.get("Memory", specs_dict.get("RAM Memory Installed Size", 'N/A')))
-
-
-                # Graphics Card (UPDATED for better specificity from title)
-                graphics_text = specs_dict.get("Graphics Coprocessor", "").lower()
-                if not graphics_text:
-                    graphics_text = specs_dict.get("Graphics Card Description", "").lower()
-                if not graphics_text:
-                    graphics_text = specs_dict.get("GPU", "").lower()
-
-                if not graphics_text and best_match_title: # Use best_match_title for graphics if specs_dict didn't yield
-                    graphics_text = best_match_title.lower()
-                
-                # Regex for specific GPU models
-                rtx_match = re.search(r'(nvidia rtx\s*\d{3,4}0)', graphics_text)
-                gtx_match = re.search(r'(nvidia gtx\s*\d{3,4}0)', graphics_text)
-                radeon_match = re.search(r'(amd radeon\s*(?:rx\s*\d{3,4}|vega|graphics)?)', graphics_text)
-
-                if rtx_match: graphics_card = rtx_match.group(1).upper()
-                elif gtx_match: graphics_card = gtx_match.group(1).upper()
-                elif radeon_match: graphics_card = radeon_match.group(1).upper()
-                elif "intel iris xe" in graphics_text: graphics_card = "Intel Iris Xe"
-                elif "integrated graphics" in graphics_text or "intel uhd" in graphics_text or "intel hd" in graphics_text:
-                    graphics_card = "Integrated"
-                elif graphics_text: # Fallback to original value if no specific match
-                    graphics_card = specs_dict.get("Graphics Coprocessor", specs_dict.get("Graphics Card Description", specs_dict.get("GPU", 'N/A')))
-                    if graphics_card == 'N/A' and best_match_title: # If still N/A, use very rough from title
-                        graphics_card = "Dedicated" if "rtx" in best_match_title.lower() or "gtx" in best_match_title.lower() or "radeon" in best_match_title.lower() else "Integrated"
-                
-                full_description_for_inference = " ".join(list(specs_dict.keys()) + list(specs_dict.values())).lower()
-
-
-            except Exception as e:
-                print(f"    Error processing structured specs: {e}. Specs will be N/A.")
-                try:
-                    full_description_for_inference = driver.find_element(By.TAG_NAME, 'body').text.lower()
-                except:
-                    pass
-
-            except NoSuchElementException:
-                print(f"  No valid product link found for '{model_name}' on Amazon search results page. Moving to next.")
-            except TimeoutException:
-                print(f"  Timed out loading product detail page for '{model_name}'. Moving to next.")
-            except Exception as e:
-                print(f"  An error occurred during product page navigation or extraction for '{model_name}': {e}")
-
-        except Exception as e:
-            print(f"An unexpected error occurred while processing '{model_name}': {e}")
-
-        laptop_data_to_save = {
-            'Model': model_name,
-            'Brand': brand,
-            'Price': price,
-            'Rating': rating,
-            'Graphics Card': graphics_card,
-            'Memory': memory,
-            'Processor': processor,
-            'Type: Work or Gaming': type_work_gaming
-        }
-        scraped_data_in_memory.append(laptop_data_to_save) 
-
-        df_single_laptop = pd.DataFrame([laptop_data_to_save])
-        df_single_laptop = df_single_laptop[column_order]
-        
-        if not csv_header_written:
-            df_single_laptop.to_csv(output_csv_name, mode='a', header=True, index=False)
-            csv_header_written = True
-        else:
-            df_single_laptop.to_csv(output_csv_name, mode='a', header=False, index=False)
-        
-        print(f"  Data for '{model_name[:50]}...' saved to CSV live.")
-
-        time.sleep(random.uniform(7, 15))
-
-except Exception as e:
-    print(f"\nAn error occurred during the scraping process: {e}")
-    print("Ensure all configurations (ChromeDriver path, CSV name) are correct and check your internet connection.")
-finally:
-    if driver:
-        driver.quit()
-        print("\nBrowser closed.")
-
-print(f"\nScraping process finished. Check '{output_csv_name}' for live updates.")
\ No newline at end of file
+import argparse
+import functools
+
+from amazon_scraper import DEFAULT_BASE_URL, scrape_model
+from asin_index import CONFIDENCE_EXACT, AsinIndex
+from checkpoint_store import CheckpointStore
+from fetchers import PagePacer, check_rss_support, create_driver, create_fetcher
+from job_queue import JobQueue, run_coordinator, run_queue_worker
+from output_sink import OUTPUT_FORMATS, create_output_sink, output_format_for
+from model_source import ModelStream, parse_shard
+from page_cache import CachingFetcher, PageCache
+from price_refresh import RefreshStore, run_refresh
+from pipeline import run_pipeline
+from product_memo import ProductPageMemo
+from rate_limiter import AdaptivePacer, HostRateLimits
+from run_metrics import RunMetrics, metric_span
+from worker_pool import run_worker_pool
+
+# --- Configuration ---
+chrome_driver_path = "chromedriver.exe"
+laptop_models_csv = "laptop_models.csv"
+output_csv_name = "scraped_laptop_data_amazon.csv"
+checkpoint_db_name = "scrape_checkpoint.db"
+asin_index_db_name = "asin_index.db"
+refresh_db_name = "price_refresh.db"
+
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape laptop specifications from Amazon for a list of models.")
+    parser.add_argument("--input", default=laptop_models_csv, help="CSV file with a 'Model' column.")
+    parser.add_argument("--shard", type=shard_arg, default=None,
+                        help="Only scrape shard k of N (e.g. 2/4); models are assigned to shards by a hash of "
+                             "the model string, so N machines can split one input file.")
+    parser.add_argument("--output", default=output_csv_name,
+                        help="File the scraped rows are appended to (a directory of part files for Parquet).")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=None,
+                        help="Format of --output (default: from its extension, .jsonl or .parquet, else CSV).")
+    parser.add_argument("--flush-rows", type=int, default=None,
+                        help="Rows buffered before they are written out (default: 25; 500 for Parquet).")
+    parser.add_argument("--flush-seconds", type=float, default=None,
+                        help="Longest time a row waits in the buffer (default: 10; 60 for Parquet).")
+    parser.add_argument("--checkpoint", default=checkpoint_db_name,
+                        help="SQLite file recording each model's status, so an interrupted run can resume "
+                             "('' disables checkpointing).")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Times a model that timed out or errored is retried across runs before it is "
+                             "written out as N/A (default: 3).")
+    parser.add_argument("--asin-index", default=asin_index_db_name,
+                        help="SQLite file mapping model names to ASINs already found; rows it resolves skip the "
+                             "search ('' disables the index).")
+    parser.add_argument("--memo-max-pages", type=int, default=10000,
+                        help="Product pages kept in memory for reuse by later rows on the same ASIN; the least "
+                             "recently used are dropped beyond it (default: 10000).")
+    parser.add_argument("--index-min-confidence", type=float, default=CONFIDENCE_EXACT,
+                        help="Lowest index match trusted to skip the search: 1.0 exact model string, 0.8 same "
+                             "name without the config part, 0.6 same brand and series (default: 1.0). Name and "
+                             "series matches are used only when the listing title names the row's config.")
+    parser.add_argument("--chromedriver", default=chrome_driver_path, help="Path to the ChromeDriver executable.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of fetch sessions (headless Chrome or HTTP) scraping in parallel (default: 1).")
+    parser.add_argument("--pacing", choices=["adaptive", "fixed"], default="adaptive",
+                        help="'adaptive' paces page loads with per-session and per-host token buckets that speed "
+                             "up while responses are healthy and back off on CAPTCHAs, 503s or empty result pages; "
+                             "'fixed' keeps the old random pauses.")
+    parser.add_argument("--max-pages-per-minute", type=float, default=0,
+                        help="Per-session cap on page loads per minute (adaptive default: 30; fixed default: no cap).")
+    parser.add_argument("--host-max-pages-per-minute", type=float, default=60,
+                        help="Cap on page loads per minute to one host across all sessions (adaptive pacing).")
+    parser.add_argument("--min-pages-per-minute", type=float, default=1,
+                        help="Slowest rate adaptive pacing backs off to (default: 1).")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Run search fetch, ranking, product fetch, extraction and output as overlapping "
+                             "asyncio stages; --workers sets the number of fetch sessions.")
+    parser.add_argument("--queue-size", type=int, default=8,
+                        help="Capacity of each queue between pipeline stages (default: 8).")
+    parser.add_argument("--backend", choices=["selenium", "http"], default="selenium",
+                        help="'selenium' drives Chrome for every page; 'http' fetches pages over pooled HTTP "
+                             "and only falls back to Chrome for pages missing the required elements.")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Let Chrome load images, media, fonts and ad/tracking requests and wait for the full "
+                             "page load. By default these are blocked and pages are used once the HTML is parsed.")
+    parser.add_argument("--recycle-pages", type=int, default=250,
+                        help="Restart a Chrome session after this many page loads (default: 250; 0 never).")
+    parser.add_argument("--recycle-rss-mb", type=float, default=0,
+                        help="Restart a Chrome session once chromedriver and its browser processes use this much "
+                             "memory (needs psutil; default: off).")
+    parser.add_argument("--cache-dir", default="",
+                        help="Directory for the on-disk cache of raw page HTML ('' disables caching).")
+    parser.add_argument("--cache-ttl-hours", type=float, default=7 * 24,
+                        help="Cached pages older than this are fetched again (default: 168).")
+    parser.add_argument("--cache-max-mb", type=float, default=1024,
+                        help="Size budget of the page cache; least recently used pages are evicted beyond it.")
+    parser.add_argument("--replay", action="store_true",
+                        help="Run the extraction from --cache-dir only: no browser, no network, no pauses. "
+                             "Checkpointing and the ASIN index are skipped so every model is re-extracted.")
+    parser.add_argument("--coordinator", metavar="QUEUE_DB", default="",
+                        help="Load the input into this SQLite job queue and write the rows the queue workers "
+                             "report back to --output, in input order. The queue replaces --checkpoint.")
+    parser.add_argument("--worker", metavar="QUEUE_DB", default="",
+                        help="Lease models from this job queue and scrape them with --workers fetch sessions, "
+                             "until the coordinator's input is done.")
+    parser.add_argument("--lease-seconds", type=float, default=600,
+                        help="How long a leased job stays invisible to other workers before it is handed out "
+                             "again, e.g. after its worker crashed (default: 600).")
+    parser.add_argument("--refresh-from", metavar="RESULTS", default="",
+                        help="Refresh mode: re-read only price and rating from the product pages behind the rows "
+                             "of these earlier results (found through --asin-index) and write the results, "
+                             "updated, to --output (may be the same file).")
+    parser.add_argument("--refresh-db", default=refresh_db_name,
+                        help="SQLite file remembering when each product page was last refreshed.")
+    parser.add_argument("--refresh-max-age-hours", type=float, default=20,
+                        help="Only product pages not refreshed for this long are revisited (default: 20).")
+    parser.add_argument("--refresh-limit", type=int, default=0,
+                        help="Revisit at most this many product pages, stalest first (default: no limit).")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", default="",
+                        help="Append every timing span (model, stage, seconds) to this file as one JSON line.")
+    parser.add_argument("--metrics-prometheus", metavar="PATH", default="",
+                        help="At the end of the run, write per-stage timings and counters to this file in the "
+                             "Prometheus text format.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help="Site to search, e.g. a local fixture server for testing.")
+    return parser.parse_args()
+
+
+def load_laptop_models(csv_path, shard=None):
+    print(f"Streaming laptop models from {csv_path}...")
+    try:
+        return ModelStream(csv_path, shard=shard)
+    except FileNotFoundError:
+        print(f"Error: '{csv_path}' not found.")
+        print("Please make sure the CSV file is in the same folder as this script.")
+        exit()
+    except ValueError as e:
+        print(f"Error: Column 'Model' not found in {csv_path} ({e}).")
+        print("Please ensure your CSV has a column exactly named 'Model'.")
+        exit()
+    except Exception as e:
+        print(f"An error occurred while reading the CSV: {e}")
+        exit()
+
+
+def main():
+    args = parse_args()
+
+    # --- 1. Load your CSV file ---
+    if args.coordinator and args.worker:
+        print("Error: a run is either the --coordinator or a --worker of a job queue, not both.")
+        exit()
+
+    job_queue = None
+    if args.coordinator or args.worker:
+        job_queue = JobQueue(args.coordinator or args.worker, lease_seconds=args.lease_seconds,
+                             max_attempts=args.max_attempts)
+
+    if args.refresh_from and (args.replay or job_queue or not args.asin_index):
+        print("Error: --refresh-from needs --asin-index and cannot be combined with --replay or a job queue.")
+        exit()
+
+    # Queue workers take their models from the queue and report rows back to
+    # it; a refresh starts from earlier results instead of the model list.
+    model_stream = None
+    laptop_models = None
+    if not args.worker and not args.refresh_from:
+        model_stream = load_laptop_models(args.input, shard=args.shard)
+        laptop_models = model_stream
+
+    if args.replay and not args.cache_dir:
+        print("Error: --replay needs --cache-dir pointing at a page cache.")
+        exit()
+
+    if args.recycle_rss_mb and not args.replay:
+        try:
+            check_rss_support()
+        except ImportError as e:
+            print(f"Error: {e}")
+            exit()
+
+    checkpoints = None
+    if args.checkpoint and laptop_models is not None and not args.replay and not job_queue:
+        checkpoints = CheckpointStore(args.checkpoint, max_attempts=args.max_attempts)
+        laptop_models = checkpoints.pending_models(laptop_models)
+
+    asin_index = None
+    if args.asin_index and not args.replay and not args.coordinator:
+        asin_index = AsinIndex(args.asin_index, min_confidence=args.index_min_confidence)
+
+    product_memo = ProductPageMemo(max_entries=max(1, args.memo_max_pages))
+    metrics = RunMetrics(spans_path=args.metrics_jsonl or None, prometheus_path=args.metrics_prometheus or None)
+
+    # A refresh must see the live pages, so it never reads the page cache.
+    page_cache = None
+    if args.cache_dir and not args.refresh_from:
+        page_cache = PageCache(args.cache_dir, ttl_seconds=args.cache_ttl_hours * 3600,
+                               max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    # --- Output sink: rows are buffered and written out in batches ---
+    output_sink = None
+    if laptop_models is not None:
+        output_format = args.output_format or output_format_for(args.output)
+        try:
+            output_sink = create_output_sink(args.output, output_format, flush_rows=args.flush_rows,
+                                             flush_seconds=args.flush_seconds)
+        except ImportError as e:
+            print(f"Error: {e}")
+            exit()
+        if output_sink.existed:
+            print(f"Warning: '{args.output}' already exists. Appending to it.")
+        else:
+            print(f"Creating new {output_format} output: '{args.output}'")
+
+    def save_laptop_data(laptop_data, status):
+        model_name = laptop_data['Model']
+        metrics.count(status)
+        if checkpoints and not checkpoints.finishes(model_name, status):
+            checkpoints.record(model_name, status)
+            print(f"  '{model_name[:50]}...' ended with status '{status}'. It will be retried on the next run.")
+            return
+        # The checkpoint is only updated once the row's batch is on disk.
+        after_flush = functools.partial(checkpoints.record, model_name, status) if checkpoints else None
+        with metric_span(metrics, "output_write", model_name):
+            output_sink.write(laptop_data, after_flush=after_flush)
+        print(f"  Data for '{model_name[:50]}...' queued for output.")
+
+    def print_run_summary():
+        if output_sink:
+            output_sink.close()
+            shard_note = f", {model_stream.other_shards} left to other shards" if args.shard else ""
+            print(f"Input: {model_stream.rows_read} rows read, {model_stream.duplicates} duplicates skipped{shard_note}.")
+            print(f"Output: {output_sink.rows_written} rows written to '{args.output}' in {output_sink.flushes} batches.")
+        if job_queue:
+            counts = job_queue.state_counts()
+            print("Job queue: " + ", ".join(f"{state}={count}" for state, count in sorted(counts.items())))
+            job_queue.close()
+        if checkpoints:
+            print(f"Checkpoint '{args.checkpoint}': {checkpoints.skipped} models skipped as already finished.")
+            counts = checkpoints.status_counts()
+            print("Checkpoint status counts: " + ", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+            checkpoints.close()
+        for limiter in host_limits.limiters.values():
+            print(f"Pacing ({limiter.name}): {limiter.pages_per_minute():.1f} pages/min at the end, "
+                  f"{limiter.throttle_events} throttling events, {limiter.waited_seconds:.0f}s spent waiting.")
+        if asin_index:
+            if not args.refresh_from:
+                print(f"ASIN index: {asin_index.hits}/{asin_index.lookups} rows resolved without a search "
+                      f"({asin_index.hit_rate():.0%} hit rate).")
+            asin_index.close()
+        if not (args.coordinator or args.refresh_from):
+            print(f"Product pages: {product_memo.fetches} scraped, {product_memo.shared} rows reused an already scraped page.")
+        if page_cache:
+            print(f"Page cache: {page_cache.hits} hits, {page_cache.misses} misses.")
+            page_cache.close()
+        print("Run metrics:")
+        for line in metrics.summary_lines():
+            print(line)
+        metrics.close()
+
+    min_interval = 60.0 / args.max_pages_per_minute if args.max_pages_per_minute > 0 else 0.0
+    host_limits = HostRateLimits(args.host_max_pages_per_minute, min_per_minute=args.min_pages_per_minute)
+    make_driver = functools.partial(create_driver, args.chromedriver, lean=not args.full_browser)
+
+    def make_pacer():
+        if args.pacing == "fixed":
+            return PagePacer(min_interval=min_interval, metrics=metrics)
+        session_max = args.max_pages_per_minute if args.max_pages_per_minute > 0 else 30
+        return AdaptivePacer(host_limits, initial_per_minute=6,
+                             min_per_minute=args.min_pages_per_minute, max_per_minute=session_max, metrics=metrics)
+
+    def make_fetcher():
+        if args.replay:
+            return CachingFetcher(None, page_cache, PagePacer(pauses=False), replay=True)
+        pacer = make_pacer()
+        fetcher = create_fetcher(args.backend, make_driver, pacer=pacer, metrics=metrics,
+                                 recycle_pages=args.recycle_pages, recycle_rss_mb=args.recycle_rss_mb)
+        if page_cache:
+            fetcher = CachingFetcher(fetcher, page_cache, pacer)
+        return fetcher
+
+    backend_name = "replay" if args.replay else args.backend
+
+    if args.coordinator:
+        # --- 2/3. Queue the input and collect what the workers scrape ---
+        def save_queue_result(job_id, laptop_data, status):
+            metrics.count(status)
+            with metric_span(metrics, "output_write", laptop_data['Model']):
+                output_sink.write(laptop_data, after_flush=functools.partial(job_queue.mark_exported, job_id))
+
+        try:
+            added = job_queue.enqueue(laptop_models)
+            print(f"Job queue '{args.coordinator}': {added} new models queued. Waiting for workers...")
+            run_coordinator(job_queue, save_queue_result)
+        finally:
+            print_run_summary()
+        print(f"\nScraping process finished. Results are in '{args.output}'.")
+        return
+
+    if args.refresh_from:
+        # --- 2/3. Refresh price and rating of earlier results ---
+        print(f"\nStarting {max(args.workers, 1)} '{backend_name}' fetch sessions to refresh '{args.refresh_from}'...")
+        refresh_store = RefreshStore(args.refresh_db)
+        fetchers = []
+        try:
+            for _ in range(max(args.workers, 1)):
+                fetchers.append(make_fetcher())
+            run_refresh(args.refresh_from, args.output, fetchers, asin_index, refresh_store,
+                        output_format=args.output_format, max_age_seconds=args.refresh_max_age_hours * 3600,
+                        limit=args.refresh_limit, flush_rows=args.flush_rows, flush_seconds=args.flush_seconds)
+        except (ValueError, ImportError, OSError) as e:
+            print(f"Error: {e}")
+        finally:
+            for fetcher in fetchers:
+                fetcher.close()
+            refresh_store.close()
+            print_run_summary()
+        return
+
+    if args.worker:
+        # --- 2/3. Scrape models leased from the job queue ---
+        print(f"\nStarting {max(args.workers, 1)} '{backend_name}' fetch sessions for queue '{args.worker}'...")
+        try:
+            completed = run_queue_worker(job_queue, max(args.workers, 1), make_fetcher, base_url=args.base_url,
+                                         asin_index=asin_index, product_memo=product_memo, metrics=metrics)
+            print(f"\nQueue drained. This worker scraped {completed} jobs.")
+        finally:
+            print_run_summary()
+        return
+
+    if args.pipeline:
+        # --- 2/3. Scrape with the staged pipeline ---
+        print(f"\nStarting {args.workers} '{backend_name}' fetch sessions for the pipeline...")
+        fetchers = []
+        try:
+            for _ in range(max(args.workers, 1)):
+                fetchers.append(make_fetcher())
+            run_pipeline(laptop_models, fetchers, save_laptop_data, base_url=args.base_url,
+                         queue_size=args.queue_size, asin_index=asin_index, product_memo=product_memo,
+                         metrics=metrics)
+        except Exception as e:
+            print(f"\nAn error occurred during the scraping process: {e}")
+        finally:
+            for fetcher in fetchers:
+                fetcher.close()
+            print_run_summary()
+        print(f"\nScraping process finished. Results are in '{args.output}'.")
+        return
+
+    if args.workers > 1:
+        # --- 2/3. Scrape with a pool of fetch sessions ---
+        print(f"\nStarting {args.workers} '{backend_name}' workers...")
+        try:
+            run_worker_pool(laptop_models, args.workers, make_fetcher, save_laptop_data,
+                            base_url=args.base_url, asin_index=asin_index, product_memo=product_memo,
+                            metrics=metrics)
+        finally:
+            print_run_summary()
+        print(f"\nScraping process finished. Results are in '{args.output}'.")
+        return
+
+    # --- 2. Initialize the fetch backend (WebDriver unless --backend http) ---
+    fetcher = None
+    try:
+        print(f"\nStarting '{backend_name}' fetch backend...")
+        fetcher = make_fetcher()
+        print("Fetch backend ready!")
+
+        # --- 3. Loop through each laptop model for scraping ---
+        for i, model_name in enumerate(laptop_models):
+            print(f"\n--- Scraping data for Model {i+1}: {model_name} ---")
+            laptop_data, status = scrape_model(fetcher, model_name, base_url=args.base_url,
+                                               asin_index=asin_index, product_memo=product_memo,
+                                               metrics=metrics)
+            save_laptop_data(laptop_data, status)
+
+    except Exception as e:
+        print(f"\nAn error occurred during the scraping process: {e}")
+        print("Ensure all configurations (ChromeDriver path, CSV name) are correct and check your internet connection.")
+    finally:
+        if fetcher:
+            fetcher.close()
+        print_run_summary()
+
+    print(f"\nScraping process finished. Results are in '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon_scraper import STATUS_DONE, STATUS_ERROR, STATUS_TIMEOUT  # noqa: E402
+from job_queue import STATE_FINISHED, STATE_LEASED, STATE_PENDING, JobQueue  # noqa: E402
+
+
+# --- JobQueue lease ownership ---
+# Leases are expired by moving lease_expires into the past instead of sleeping.
+class JobQueueLeaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmp.name, "queue.db"), lease_seconds=60, max_attempts=2)
+        self.queue.enqueue(["Model A"])
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp.cleanup()
+
+    def expire(self, job_id, seconds_ago=1):
+        self.queue.conn.execute("UPDATE jobs SET lease_expires = strftime('%s', 'now') - ? WHERE id = ?",
+                                (seconds_ago, job_id))
+
+    def job(self, job_id):
+        return self.queue.conn.execute(
+            "SELECT state, owner, status, laptop_data FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+    def test_expired_lease_is_taken_over(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.assertEqual(self.queue.lease("w2"), [])
+        self.expire(job_id)
+        self.assertEqual(self.queue.lease("w2"), [(job_id, "Model A")])
+        self.assertEqual(self.job(job_id)[:2], (STATE_LEASED, "w2"))
+
+    def test_stale_success_does_not_overwrite(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.expire(job_id)
+        self.queue.lease("w2")
+        self.assertTrue(self.queue.complete(job_id, "w2", {'Model': "Model A", 'Price': "2"}, STATUS_DONE))
+        self.assertFalse(self.queue.complete(job_id, "w1", {'Model': "Model A", 'Price': "1"}, STATUS_DONE))
+        state, owner, status, laptop_data = self.job(job_id)
+        self.assertEqual((state, owner, status), (STATE_FINISHED, "w2", STATUS_DONE))
+        self.assertIn('"2"', laptop_data)
+
+    def test_stale_timeout_does_not_release_new_lease(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.expire(job_id)
+        self.queue.lease("w2")
+        self.assertFalse(self.queue.complete(job_id, "w1", {'Model': "Model A"}, STATUS_TIMEOUT))
+        self.assertEqual(self.job(job_id)[:2], (STATE_LEASED, "w2"))
+
+    def test_retry_puts_job_back(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.assertTrue(self.queue.complete(job_id, "w1", {'Model': "Model A"}, STATUS_TIMEOUT))
+        self.assertEqual(self.job(job_id)[:2], (STATE_PENDING, None))
+
+    def test_late_result_on_last_attempt_is_kept(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.expire(job_id)
+        self.queue.lease("w2")
+        self.expire(job_id)
+        # Out of attempts: not re-leased, and not yet finished as an error.
+        self.assertEqual(self.queue.lease("w3"), [])
+        self.assertTrue(self.queue.complete(job_id, "w2", {'Model': "Model A", 'Price': "2"}, STATUS_DONE))
+        self.assertEqual(self.job(job_id)[:3], (STATE_FINISHED, "w2", STATUS_DONE))
+
+    def test_last_attempt_finishes_as_error_after_grace(self):
+        (job_id, _), = self.queue.lease("w1")
+        self.expire(job_id)
+        self.queue.lease("w2")
+        self.expire(job_id, seconds_ago=120)
+        self.assertEqual(self.queue.lease("w3"), [])
+        self.assertEqual(self.job(job_id)[0::2], (STATE_FINISHED, STATUS_ERROR))
+        self.assertFalse(self.queue.complete(job_id, "w2", {'Model': "Model A"}, STATUS_DONE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from output_sink import create_output_sink, read_output_rows  # noqa: E402
+
+
+# --- Recovery of a line file torn by a crash ---
+class LineFileRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reopen_and_write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        sink = create_output_sink(path)
+        sink.write({'Model': "x"})
+        sink.close()
+        return path
+
+    def test_torn_first_batch_gets_a_header(self):
+        path = self.reopen_and_write("out.csv", "Model,Bra")
+        self.assertEqual([row['Model'] for row in read_output_rows(path)], ["x"])
+
+    def test_torn_jsonl_line_is_dropped(self):
+        path = self.reopen_and_write("out.jsonl", '{"Model": "a"}\n{"Mod')
+        self.assertEqual([row['Model'] for row in read_output_rows(path)], ["a", "x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
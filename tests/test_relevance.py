@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from amazon_scraper import RelevanceScorer, calculate_relevance_score, rank_candidates  # noqa: E402
+from bench_relevance import candidate_titles, load_rows  # noqa: E402
+
+
+# --- RelevanceScorer parity ---
+# Every model of laptop_models.csv against the candidate titles the relevance
+# benchmark builds for it (nearby model names, refurbished and sponsored-style
+# variants).
+class RelevanceScorerParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rows = load_rows(os.path.join(REPO_DIR, "laptop_models.csv"))
+        cls.batches = [(model, candidate_titles(rows, i, 15)) for i, (model, _) in enumerate(rows)]
+
+    def test_scores_match_calculate_relevance_score(self):
+        for model, titles in self.batches:
+            scorer = RelevanceScorer(model)
+            for title in titles:
+                self.assertEqual(scorer.score(title), calculate_relevance_score(title, model), (model, title))
+
+    def test_scores_never_exceed_best_possible(self):
+        for model, titles in self.batches:
+            scorer = RelevanceScorer(model)
+            for title in titles + [model]:
+                self.assertLessEqual(scorer.score(title), scorer.best_possible, (model, title))
+
+    def test_early_exit_picks_the_same_card(self):
+        for i, (model, titles) in enumerate(self.batches):
+            cards = [{'title': title, 'sponsored': j % 5 == 4, 'link': f"/dp/B{i:04d}{j:05d}"}
+                     for j, title in enumerate(titles[i % len(titles):] + titles[:i % len(titles)])]
+            self.assertEqual(rank_candidates(cards, model)[:3], rank_candidates(cards, model, early_exit=False)[:3],
+                             model)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from amazon_scraper import build_product_details, extract_specs  # noqa: E402
+from bench_specs import load_rows, product_infos  # noqa: E402
+
+
+# --- Table-driven spec extraction parity ---
+# extract_specs (SPEC_FIELD_RULES) against build_product_details on the varied
+# product pages the spec benchmark builds from laptop_models.csv: alternative
+# spec keys, missing / empty / 'N/A' values, "8 GB RAM" style values, bylines.
+class SpecExtractionParityTest(unittest.TestCase):
+    def test_extract_specs_matches_build_product_details(self):
+        cases = product_infos(load_rows(os.path.join(REPO_DIR, "laptop_models.csv")), 5)
+        for info, title in cases:
+            self.assertEqual(extract_specs(info, title), build_product_details(info, title), (info, title))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import queue
+import threading
+
+from amazon_scraper import DEFAULT_BASE_URL, STATUS_ERROR, empty_laptop_record, scrape_model
+
+
+# --- Worker pool of fetch sessions ---
+# Every worker thread owns one fetcher (browser session and pacer), and pulls
+# (index, model) jobs from a shared queue. Results are handed back to the
+# caller as (row, status) in input order, so the output file matches a
+# sequential run. The main thread reads laptop_models lazily and keeps at most
+# max_in_flight models between the queue and on_result, which also bounds the
+# reorder buffer.
+def run_worker_pool(laptop_models, num_workers, make_fetcher, on_result,
+                    base_url=DEFAULT_BASE_URL, asin_index=None, product_memo=None, max_in_flight=None,
+                    metrics=None):
+    jobs = queue.Queue()
+    max_in_flight = max_in_flight or num_workers * 8
+
+    results = queue.Queue()
+    alive = [0]
+    alive_lock = threading.Lock()
+
+    def worker(worker_id):
+        fetcher = None
+        try:
+            try:
+                fetcher = make_fetcher()
+            except Exception as e:
+                print(f"[worker {worker_id}] Could not start fetch session: {e}")
+                return
+            print(f"[worker {worker_id}] Fetch session started.")
+
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+                i, model_name = job
+                print(f"\n[worker {worker_id}] --- Scraping data for Model {i+1}: {model_name} ---")
+                try:
+                    result = scrape_model(fetcher, model_name, base_url=base_url,
+                                          asin_index=asin_index, product_memo=product_memo, metrics=metrics)
+                except Exception as e:
+                    print(f"[worker {worker_id}] Unexpected error while processing '{model_name}': {e}")
+                    result = (empty_laptop_record(model_name), STATUS_ERROR)
+                results.put((i, result))
+        finally:
+            if fetcher:
+                fetcher.close()
+            with alive_lock:
+                alive[0] -= 1
+
+    threads = []
+    alive[0] = num_workers
+    for worker_id in range(num_workers):
+        thread = threading.Thread(target=worker, args=(worker_id + 1,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    # Reorder buffer: rows are passed to on_result strictly in input order.
+    models = enumerate(laptop_models)
+    submitted = 0
+    exhausted = False
+    pending = {}
+    next_index = 0
+    while True:
+        while not exhausted and submitted - next_index < max_in_flight:
+            job = next(models, None)
+            if job is None:
+                exhausted = True
+                for _ in range(num_workers):
+                    jobs.put(None)
+            else:
+                jobs.put(job)
+                submitted += 1
+        if exhausted and next_index == submitted:
+            break
+        try:
+            i, result = results.get(timeout=1)
+        except queue.Empty:
+            with alive_lock:
+                workers_left = alive[0]
+            if workers_left == 0 and results.empty():
+                print("All workers have stopped before finishing the model list.")
+                break
+            continue
+        pending[i] = result
+        while next_index in pending:
+            on_result(*pending.pop(next_index))
+            next_index += 1
+
+    for thread in threads:
+        thread.join()
+    return next_index